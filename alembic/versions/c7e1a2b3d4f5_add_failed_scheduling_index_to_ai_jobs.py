@@ -0,0 +1,31 @@
+"""add partial index for failed-scheduling ai_jobs
+
+Revision ID: c7e1a2b3d4f5
+Revises: 890775648562
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1a2b3d4f5'
+down_revision = '890775648562'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial index covering only jobs that were created but could not be scheduled
+    op.create_index(
+        'idx_ai_jobs_failed_scheduling',
+        'ai_jobs',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'QUEUED' AND error_message IS NOT NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ai_jobs_failed_scheduling', table_name='ai_jobs')
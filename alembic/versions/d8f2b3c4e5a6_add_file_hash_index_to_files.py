@@ -0,0 +1,25 @@
+"""add file_hash index for content deduplication
+
+Revision ID: d8f2b3c4e5a6
+Revises: c7e1a2b3d4f5
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b3c4e5a6'
+down_revision = 'c7e1a2b3d4f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Index for looking up stored content by hash across all projects
+    op.create_index('idx_files_hash', 'files', ['file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_files_hash', table_name='files')
@@ -0,0 +1,30 @@
+"""add (project_id, file_name) index to files
+
+Revision ID: e9a3c4d5f6b7
+Revises: d8f2b3c4e5a6
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a3c4d5f6b7'
+down_revision = 'd8f2b3c4e5a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Together with idx_files_project_hash this lets the duplicate check use a bitmap OR
+    op.create_index(
+        'idx_files_project_name',
+        'files',
+        ['project_id', 'file_name'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_files_project_name', table_name='files')
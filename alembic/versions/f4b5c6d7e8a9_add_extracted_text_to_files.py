@@ -0,0 +1,25 @@
+"""add extracted_text to files
+
+Revision ID: f4b5c6d7e8a9
+Revises: e9a3c4d5f6b7
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b5c6d7e8a9'
+down_revision = 'e9a3c4d5f6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cache of the document text so AI job retries skip re-parsing the upload
+    op.add_column('files', sa.Column('extracted_text', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'extracted_text')
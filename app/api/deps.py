@@ -2,10 +2,9 @@ from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from jose import JWTError
 
-from app.core.config import settings
-from app.core.security import ALGORITHM
+from app.core.security import verify_token
 from app.db.session import SessionLocal
 from app.db.models.user import User
 from app.schemas.user import TokenData
@@ -38,8 +37,11 @@ def get_current_user(
         # Extract token from credentials
         token = credentials.credentials
         
-        # Decode JWT token
-        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+        # Decode JWT token (cached after first verification)
+        payload = verify_token(token)
+        if payload is None:
+            raise credentials_exception
+        
         user_id: str = payload.get("sub")
         
         if user_id is None:
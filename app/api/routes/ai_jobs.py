@@ -158,8 +158,7 @@ def get_failed_scheduling_jobs(
             detail="Project not found or access denied"
         )
     
-    # Get all failed scheduling jobs and filter by project
-    failed_jobs = AIJobService.get_failed_scheduling_jobs(db)
-    project_failed_jobs = [job for job in failed_jobs if job.project_id == project_id]
+    # Get failed scheduling jobs for this project
+    failed_jobs = AIJobService.get_failed_scheduling_jobs(db, project_id=project_id)
     
-    return [AIJobResponse.from_orm(job) for job in project_failed_jobs]
+    return [AIJobResponse.from_orm(job) for job in failed_jobs]
@@ -1,6 +1,6 @@
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File as FastAPIFile
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File as FastAPIFile
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
@@ -17,6 +17,7 @@ router = APIRouter()
 @router.post("/projects/{project_id}/files/upload", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
     project_id: UUID,
+    background_tasks: BackgroundTasks,
     file: UploadFile = FastAPIFile(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -26,7 +27,26 @@ async def upload_file(
         db=db, 
         project_id=project_id, 
         file=file, 
-        user_id=current_user.id
+        user_id=current_user.id,
+        background_tasks=background_tasks
+    )
+
+
+@router.post("/projects/{project_id}/files/upload-bulk", response_model=List[FileUploadResponse], status_code=status.HTTP_201_CREATED)
+async def upload_files_bulk(
+    project_id: UUID,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = FastAPIFile(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload several requirements documents (PDF/DOCX) to a project at once."""
+    return await FileService.upload_files_bulk(
+        db=db, 
+        project_id=project_id, 
+        files=files, 
+        user_id=current_user.id,
+        background_tasks=background_tasks
     )
 
 
@@ -73,7 +93,7 @@ async def delete_file(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a file."""
-    success = FileService.delete_file(
+    success = await FileService.delete_file(
         db=db,
         file_id=file_id,
         user_id=current_user.id
@@ -25,6 +25,10 @@ class ChatResponse(BaseModel):
     error: str = None
 
 
+class BulkIndexRequest(BaseModel):
+    file_ids: List[UUID]
+
+
 class DocumentInfo(BaseModel):
     id: str
     file_name: str
@@ -54,7 +58,7 @@ def get_project_documents(
 
 
 @router.post("/projects/{project_id}/chat", response_model=ChatResponse)
-def chat_with_document(
+async def chat_with_document(
     project_id: UUID,
     chat_request: ChatRequest,
     db: Session = Depends(get_db),
@@ -62,7 +66,7 @@ def chat_with_document(
 ):
     """Chat with a specific document using RAG."""
     try:
-        result = rag_service.chat_with_document(
+        result = await rag_service.chat_with_document(
             db=db,
             project_id=project_id,
             file_id=chat_request.file_id,
@@ -117,4 +121,26 @@ def index_document(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error indexing document: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/projects/{project_id}/documents/index")
+def index_documents_bulk(
+    project_id: UUID,
+    index_request: BulkIndexRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Index several documents for RAG in batched ChromaDB writes."""
+    try:
+        return rag_service.index_documents_bulk(
+            db=db,
+            file_ids=index_request.file_ids,
+            user_id=current_user.id,
+            project_id=project_id
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error indexing documents: {str(e)}"
+        )
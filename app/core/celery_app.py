@@ -5,6 +5,14 @@ import os
 # Ensure we have Redis connection before creating Celery app
 redis_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:9095/0")
 
+# Long-running AI jobs get their own queue so one-at-a-time prefetch doesn't
+# penalize short tasks; workers must consume it, e.g.
+#   celery -A app.core.celery_app worker -Q ai_jobs,rag_indexing,celery
+ai_jobs_queue = os.getenv("CELERY_AI_JOBS_QUEUE", "ai_jobs")
+
+# RAG indexing runs separately so it can be scaled without holding AI job slots
+rag_indexing_queue = os.getenv("CELERY_RAG_INDEXING_QUEUE", "rag_indexing")
+
 # Create Celery instance
 celery_app = Celery(
     "task_generator",
@@ -24,9 +32,15 @@ celery_app.conf.update(
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=1000,
+    # Recycle workers regularly to bound memory growth from PDF/DOCX parsers
+    worker_max_tasks_per_child=50,
     # Add these to fix unpacking issues
     worker_disable_rate_limits=True,
     task_acks_late=True,
     task_reject_on_worker_lost=True,
+    task_routes={
+        "app.tasks.ai_jobs.process_ai_job": {"queue": ai_jobs_queue},
+        "app.tasks.ai_jobs.process_ai_job_minimal": {"queue": ai_jobs_queue},
+        "app.tasks.ai_jobs.index_document_for_rag": {"queue": rag_indexing_queue},
+    },
 )
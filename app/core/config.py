@@ -28,6 +28,8 @@ class Settings(BaseSettings):
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     openrouter_api_key: str = os.getenv("OPENROUTER_API_KEY", "")
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    embedding_quantize_int8: bool = os.getenv("EMBEDDING_QUANTIZE_INT8", "false").lower() == "true"
     
     # Celery Configuration  
     celery_broker_url: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:9095/0")
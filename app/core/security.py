@@ -1,5 +1,9 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -18,6 +22,12 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT Bearer scheme
 security = HTTPBearer()
 
+# Cache of verified token payloads keyed by a digest of the raw token
+TOKEN_CACHE_MAX_SIZE = 50_000
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -38,13 +48,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_cache_key(token: str) -> bytes:
+    """Digest the token so the cache never retains raw credentials"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode JWT token"""
+    """Verify and decode JWT token, reusing recently verified payloads"""
+    key = _token_cache_key(token)
+    now = time.time()
+    
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+        if cached is not None:
+            payload, expires_at = cached
+            if now < expires_at:
+                _token_cache.move_to_end(key)
+                return dict(payload)
+            del _token_cache[key]
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    
+    # Never keep an entry past the token's own expiry
+    expires_at = now + TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    
+    if expires_at > now:
+        with _token_cache_lock:
+            _token_cache[key] = (payload, expires_at)
+            _token_cache.move_to_end(key)
+            while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
+    
+    return dict(payload)
 
 
 def get_current_user(
@@ -2,7 +2,7 @@ import uuid
 from sqlalchemy import Column, String, DateTime, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.session import Base
 
 class File(Base):
@@ -15,6 +15,8 @@ class File(Base):
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     file_hash = Column(String(64), nullable=True)  # SHA-256 hash for duplicate detection
     file_size = Column(String, nullable=True)  # File size in bytes
+    # Text pulled from the document on first processing; deferred so listings don't load it
+    extracted_text = deferred(Column(Text, nullable=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
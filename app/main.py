@@ -6,13 +6,24 @@ from app.db.session import test_connection, get_db
 from app.db.models.user import User, UserRole
 from app.core.security import get_password_hash
 import logging
+import queue
 import uuid
+from logging.handlers import QueueHandler, QueueListener
 
 # Import all models to ensure proper SQLAlchemy relationship configuration
 from app.db import base  # This imports all models in the correct order
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging; records are handed off to a background listener thread so
+# request handlers never block on writing to stderr
+log_queue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+# The listener's stream handler does the formatting; the queue handler only passes the message on
+log_queue_handler = QueueHandler(log_queue)
+log_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[log_queue_handler], force=True)
+log_listener = QueueListener(log_queue, log_stream_handler)
+log_listener.start()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI application
@@ -41,6 +52,13 @@ async def startup_event():
     else:
         logger.error("❌ Database connection failed - check your configuration")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled HTTP connections and flush pending log records on shutdown."""
+    from app.services.rag_service import rag_service
+    await rag_service.aclose()
+    log_listener.stop()
+
 async def create_admin_user():
     """Create admin user if not already exists."""
     try:
@@ -6,6 +6,7 @@ import google.generativeai as genai
 from openai import OpenAI
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
 
 
@@ -46,6 +47,9 @@ class ParsedRequirements(BaseModel):
 
 
 class AIParser:
+    # Upper bound on LLM requests in flight for one document
+    LLM_CONCURRENCY = 8
+    
     def __init__(self):
         # Gemini model configurations
         self.gemini_models = [
@@ -936,10 +940,14 @@ Parse this text into structured work items. Return ONLY valid JSON matching the
             'summary': f"Consolidated {len(epic_work_items)} epics from requirements"
         })
         
-        # Break down each epic
-        for i, epic in enumerate(consolidated_epics):
-            print(f"   🔨 Breaking down epic {i+1}/{len(consolidated_epics)}: '{epic['title']}'")
-            breakdown_result = self.breakdown_epic_to_work_items(epic, text)
+        # Break down each epic; the calls are independent, so issue them concurrently
+        print(f"   🔨 Breaking down {len(consolidated_epics)} epics concurrently")
+        breakdown_results = self._map_concurrently(
+            lambda epic: self.breakdown_epic_to_work_items(epic, text),
+            consolidated_epics
+        )
+        for i, (epic, breakdown_result) in enumerate(zip(consolidated_epics, breakdown_results)):
+            print(f"   🔨 Epic {i+1}/{len(consolidated_epics)}: '{epic['title']}'")
             
             if breakdown_result.get('work_items'):
                 all_results.append(breakdown_result)
@@ -1007,15 +1015,18 @@ Parse this text into structured work items. Return ONLY valid JSON matching the
         remaining_items = max_total_items - total_work_items
         items_per_epic = max(1, remaining_items // len(consolidated_epics)) if consolidated_epics else 1
         
-        for i, epic in enumerate(consolidated_epics):
+        # Fetch the (at most 3) breakdowns concurrently, then apply the limits in epic order
+        breakdown_results = self._map_concurrently(
+            lambda epic: self.breakdown_epic_to_work_items(epic, text),
+            consolidated_epics
+        ) if total_work_items < max_total_items else []
+        
+        for i, (epic, breakdown_result) in enumerate(zip(consolidated_epics, breakdown_results)):
             if total_work_items >= max_total_items:
                 break
                 
             print(f"   🔨 Minimal breakdown of epic {i+1}: '{epic['title']}' (max {items_per_epic} items)")
             
-            # Get breakdown but limit items strictly
-            breakdown_result = self.breakdown_epic_to_work_items(epic, text)
-            
             if breakdown_result.get('work_items'):
                 # Take only the most essential items
                 limited_items = breakdown_result['work_items'][:items_per_epic]
@@ -1037,6 +1048,13 @@ Parse this text into structured work items. Return ONLY valid JSON matching the
         print(f"🎉 Ultra-minimal parsing completed: {total_work_items} total work items (max {max_total_items})")
         return all_results
 
+    def _map_concurrently(self, func, items: List[Any]) -> List[Any]:
+        """Apply func to items on a bounded thread pool, returning results in input order."""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.LLM_CONCURRENCY, len(items))) as executor:
+            return list(executor.map(func, items))
+
     def chunk_text(self, text: str, max_chunk_size: int = 3000) -> List[str]:
         """Split text into manageable chunks for AI processing."""
         if len(text) <= max_chunk_size:
@@ -1072,16 +1090,19 @@ Parse this text into structured work items. Return ONLY valid JSON matching the
         
         # Split into chunks
         chunks = self.chunk_text(text)
-        all_results = []
         
-        for i, chunk in enumerate(chunks):
+        def parse_chunk(indexed_chunk):
+            i, chunk = indexed_chunk
             try:
-                result = self.parse_requirements_chunk(chunk, i)
-                all_results.append(result)
+                return self.parse_requirements_chunk(chunk, i)
             except Exception as e:
                 print(f"Failed to parse chunk {i}: {e}")
                 # Continue with other chunks
-                continue
+                return None
+        
+        # Chunks are parsed independently, so their LLM calls can overlap
+        results = self._map_concurrently(parse_chunk, list(enumerate(chunks)))
+        all_results = [result for result in results if result is not None]
         
         if not all_results:
             raise Exception("Failed to parse any chunks of the document")
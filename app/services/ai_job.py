@@ -1,3 +1,5 @@
+import logging
+import uuid
 from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
@@ -6,30 +8,40 @@ from fastapi import HTTPException, status
 from app.db.models.ai_job import AIJob, JobStatus
 from app.schemas.ai_job import AIJobCreate, AIJobUpdate, AIJobResponse
 
+logger = logging.getLogger(__name__)
+
 
 class AIJobService:
     @staticmethod
-    def create_ai_job(db: Session, job_data: AIJobCreate) -> AIJobResponse:
-        """Create a new AI job for file processing."""
+    def _create_ai_job_row(db: Session, job_data: AIJobCreate) -> AIJob:
+        """Stage a new queued AI job in the current transaction without committing."""
         db_job = AIJob(
+            id=uuid.uuid4(),
             project_id=job_data.project_id,
             file_id=job_data.file_id,
             status=JobStatus.QUEUED,
             progress=0
         )
         db.add(db_job)
-        db.commit()
-        db.refresh(db_job)
+        return db_job
+
+    @staticmethod
+    def _schedule_ai_job(db: Session, db_job: AIJob, minimal: bool = False) -> AIJobResponse:
+        """Publish a committed AI job to Celery, persisting the error if scheduling fails."""
+        job_label = "Minimal job" if minimal else "Job"
         
         # Try to trigger background processing, but handle Redis connection errors gracefully
         try:
-            from app.tasks.ai_jobs import process_ai_job
-            process_ai_job.delay(str(db_job.id))
+            if minimal:
+                from app.tasks.ai_jobs import process_ai_job_minimal as task
+            else:
+                from app.tasks.ai_jobs import process_ai_job as task
+            task.delay(str(db_job.id))
         except Exception as e:
             # If Celery/Redis is not available, persist the error and keep job in QUEUED status
-            error_msg = f"Background task scheduling failed: {str(e)}. Job created but not scheduled for background processing."
-            print(f"Warning: {error_msg}")
-            print(f"Job {db_job.id} created but not scheduled for background processing")
+            error_msg = f"Background task scheduling failed: {str(e)}. {job_label} created but not scheduled for background processing."
+            logger.warning("Background task scheduling failed: %s", e)
+            logger.warning("%s %s created but not scheduled for background processing", job_label, db_job.id)
             
             # Update the job with the error message but keep it in QUEUED status
             # This allows manual retry or alternative processing later
@@ -40,35 +52,50 @@ class AIJobService:
         return AIJobResponse.from_orm(db_job)
 
     @staticmethod
-    def create_ai_job_minimal(db: Session, job_data: AIJobCreate) -> AIJobResponse:
-        """Create a new AI job for minimal file processing (max 10 work items)."""
-        db_job = AIJob(
-            project_id=job_data.project_id,
-            file_id=job_data.file_id,
-            status=JobStatus.QUEUED,
-            progress=0
-        )
-        db.add(db_job)
-        db.commit()
-        db.refresh(db_job)
-        
-        # Try to trigger background processing with minimal flag
+    def _schedule_ai_jobs(db: Session, job_ids: List[UUID]) -> None:
+        """Publish several committed AI jobs to Celery as one group, persisting the error if scheduling fails."""
         try:
-            from app.tasks.ai_jobs import process_ai_job_minimal
-            process_ai_job_minimal.delay(str(db_job.id))
+            from celery import group
+            from app.tasks.ai_jobs import process_ai_job
+            group(process_ai_job.s(str(job_id)) for job_id in job_ids).apply_async()
         except Exception as e:
-            # If Celery/Redis is not available, persist the error and keep job in QUEUED status
-            error_msg = f"Background task scheduling failed: {str(e)}. Minimal job created but not scheduled for background processing."
-            print(f"Warning: {error_msg}")
-            print(f"Minimal job {db_job.id} created but not scheduled for background processing")
+            # If Celery/Redis is not available, persist the error and keep jobs in QUEUED status
+            error_msg = f"Background task scheduling failed: {str(e)}. Job created but not scheduled for background processing."
+            logger.warning("Background task scheduling failed for %d jobs: %s", len(job_ids), e)
             
-            # Update the job with the error message but keep it in QUEUED status
-            # This allows manual retry or alternative processing later
-            db_job.error_message = error_msg
+            db.query(AIJob).filter(AIJob.id.in_(job_ids)).update(
+                {AIJob.error_message: error_msg},
+                synchronize_session=False
+            )
             db.commit()
-            db.refresh(db_job)
+
+    @staticmethod
+    def schedule_ai_jobs_background(job_ids: List[UUID]) -> None:
+        """Publish committed AI jobs from a background task, using its own session outside the request."""
+        from app.db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            AIJobService._schedule_ai_jobs(db, job_ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    def create_ai_job(db: Session, job_data: AIJobCreate) -> AIJobResponse:
+        """Create a new AI job for file processing."""
+        db_job = AIJobService._create_ai_job_row(db, job_data)
+        db.commit()
+        db.refresh(db_job)
         
-        return AIJobResponse.from_orm(db_job)
+        return AIJobService._schedule_ai_job(db, db_job)
+
+    @staticmethod
+    def create_ai_job_minimal(db: Session, job_data: AIJobCreate) -> AIJobResponse:
+        """Create a new AI job for minimal file processing (max 10 work items)."""
+        db_job = AIJobService._create_ai_job_row(db, job_data)
+        db.commit()
+        db.refresh(db_job)
+        
+        return AIJobService._schedule_ai_job(db, db_job, minimal=True)
 
     @staticmethod
     def get_job(db: Session, job_id: UUID) -> Optional[AIJob]:
@@ -110,9 +137,28 @@ class AIJobService:
         return AIJobResponse.from_orm(job)
 
     @staticmethod
-    def get_queued_jobs(db: Session) -> List[AIJob]:
-        """Get all queued jobs for background processing."""
-        return db.query(AIJob).filter(AIJob.status == JobStatus.QUEUED).all()
+    def claim_queued_jobs(db: Session, batch_size: int = 32) -> List[UUID]:
+        """Atomically claim a batch of queued jobs for processing and return their IDs.
+        
+        Uses FOR UPDATE SKIP LOCKED so concurrent workers never claim the same job.
+        """
+        job_ids = [
+            job_id for (job_id,) in db.query(AIJob.id)
+            .filter(AIJob.status == JobStatus.QUEUED)
+            .order_by(AIJob.created_at)
+            .with_for_update(skip_locked=True)
+            .limit(batch_size)
+            .all()
+        ]
+        
+        if job_ids:
+            db.query(AIJob).filter(AIJob.id.in_(job_ids)).update(
+                {AIJob.status: JobStatus.PROCESSING, AIJob.progress: 10},
+                synchronize_session=False
+            )
+        
+        db.commit()
+        return job_ids
 
     @staticmethod
     def mark_job_processing(db: Session, job_id: UUID) -> Optional[AIJobResponse]:
@@ -156,11 +202,11 @@ class AIJobService:
         try:
             from app.tasks.ai_jobs import process_ai_job
             process_ai_job.delay(str(job.id))
-            print(f"Job {job.id} successfully rescheduled for background processing")
+            logger.info("Job %s successfully rescheduled for background processing", job.id)
         except Exception as e:
             # If scheduling fails again, persist the new error
             error_msg = f"Job retry failed: {str(e)}. Background task scheduling still unavailable."
-            print(f"Warning: {error_msg}")
+            logger.warning("Job retry failed: %s", e)
             job.error_message = error_msg
             db.commit()
             db.refresh(job)
@@ -168,9 +214,18 @@ class AIJobService:
         return AIJobResponse.from_orm(job)
 
     @staticmethod
-    def get_failed_scheduling_jobs(db: Session) -> List[AIJob]:
-        """Get all jobs that failed to be scheduled (QUEUED status with error_message)."""
-        return db.query(AIJob).filter(
+    def get_failed_scheduling_jobs(
+        db: Session,
+        project_id: Optional[UUID] = None,
+        limit: int = 100
+    ) -> List[AIJob]:
+        """Get jobs that failed to be scheduled (QUEUED status with error_message), oldest first."""
+        query = db.query(AIJob).filter(
             AIJob.status == JobStatus.QUEUED,
             AIJob.error_message.isnot(None)
-        ).all()
\ No newline at end of file
+        )
+        
+        if project_id is not None:
+            query = query.filter(AIJob.project_id == project_id)
+        
+        return query.order_by(AIJob.created_at).limit(limit).all()
\ No newline at end of file
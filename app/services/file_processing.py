@@ -1,12 +1,21 @@
 import os
 import uuid
+import logging
+import asyncio
 import hashlib
-from typing import List, Optional
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import BinaryIO, Iterable, List, Mapping, Optional, Tuple
 from uuid import UUID
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status, UploadFile
-from pathlib import Path
+from fastapi import BackgroundTasks, HTTPException, status, UploadFile
 
+from app.db.models.ai_job import AIJob, JobStatus
 from app.db.models.file import File
 from app.db.models.project import Project
 from app.schemas.file import FileCreate, FileUploadResponse
@@ -14,29 +23,124 @@ from app.services.ai_job import AIJobService
 from app.schemas.ai_job import AIJobCreate
 from app.core.supabase import supabase_storage
 
+logger = logging.getLogger(__name__)
+
+
+def _resolve_sha256_factory():
+    """Pick the fastest available SHA-256 constructor.
+    
+    OpenSSL-backed hashlib dispatches to SHA-NI / ARMv8 crypto instructions on
+    capable CPUs; usedforsecurity=False keeps it usable on FIPS builds since the
+    hash is only used for duplicate detection.
+    """
+    try:
+        hashlib.new("sha256", usedforsecurity=False)
+        return partial(hashlib.new, "sha256", usedforsecurity=False)
+    except (TypeError, ValueError):
+        return hashlib.sha256
+
+
+_sha256 = _resolve_sha256_factory()
+
+# hashlib releases the GIL while digesting large buffers, so concurrent uploads
+# hash on separate cores. A dedicated pool sized to the CPU count keeps hashing
+# from queueing behind blocking storage I/O in the default executor.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="upload-hash"
+)
+
+# One reusable read buffer per hashing thread, so the pool bounds buffer memory
+_hash_buffers = threading.local()
+
+# MIME content types by file extension
+_CONTENT_TYPES: Mapping[str, str] = MappingProxyType({
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.doc': 'application/msword'
+})
+
+# Local upload directories already created by this process
+_ensured_dirs: set = set()
+_ensured_dirs_lock = threading.Lock()
+
 
 class FileService:
     # Allowed file extensions
-    ALLOWED_EXTENSIONS = {".pdf", ".docx", ".doc"}
+    ALLOWED_EXTENSIONS = frozenset({".pdf", ".docx", ".doc"})
+    _ALLOWED_EXTENSIONS_STR = ", ".join(sorted(ALLOWED_EXTENSIONS))
+    
+    # Chunk size used when streaming uploads
+    UPLOAD_CHUNK_SIZE = 1 << 20
+    
+    # Maximum number of concurrent storage writes for a bulk upload
+    UPLOAD_CONCURRENCY = 8
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def _should_use_supabase() -> bool:
-        """Check if Supabase should be used for storage."""
+        """Check if Supabase should be used for storage (evaluated once per process)."""
         return supabase_storage.is_available()
     
     @staticmethod
-    def _create_upload_directory():
-        """Create upload directory if it doesn't exist"""
-        Path("uploads").mkdir(exist_ok=True)
+    def _ensure_dir(path: str) -> None:
+        """Create a directory once per process, skipping the syscalls when already done"""
+        if path in _ensured_dirs:
+            return
+        with _ensured_dirs_lock:
+            if path not in _ensured_dirs:
+                os.makedirs(path, exist_ok=True)
+                _ensured_dirs.add(path)
     
     @staticmethod
-    def _create_upload_directory():
-        """Create upload directory if it doesn't exist"""
-        Path("uploads").mkdir(exist_ok=True)
+    def _write_local_file(local_path: str, source: BinaryIO) -> None:
+        """Copy file content to local storage (blocking, run in a worker thread)"""
+        FileService._ensure_dir(os.path.dirname(local_path))
+        source.seek(0)
+        with open(local_path, "wb") as buffer:
+            # A spooled upload that rolled over to disk is a real file; let the
+            # kernel copy it without passing the bytes through user space.
+            # (Calling fileno() on a spool still in memory would force a rollover.)
+            if hasattr(os, "sendfile") and getattr(source, "_rolled", False):
+                try:
+                    FileService._sendfile(source.fileno(), buffer.fileno())
+                    return
+                except OSError:
+                    # Filesystems without sendfile support fall back to a buffered copy
+                    buffer.seek(0)
+                    buffer.truncate()
+                    source.seek(0)
+            shutil.copyfileobj(source, buffer, FileService.UPLOAD_CHUNK_SIZE)
+    
+    @staticmethod
+    def _sendfile(src_fd: int, dst_fd: int) -> None:
+        """Copy a whole file between descriptors with os.sendfile"""
+        size = os.fstat(src_fd).st_size
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
     
     @staticmethod
-    def _validate_file(file: UploadFile) -> None:
-        """Validate uploaded file"""
+    def _upload_to_supabase(unique_filename: str, source: BinaryIO, content_type: str) -> str:
+        """Upload file content to Supabase storage (blocking, run in a worker thread)"""
+        source.seek(0)
+        return supabase_storage.upload_file(unique_filename, source.read(), content_type)
+    
+    @staticmethod
+    def _get_file_extension(filename: str) -> str:
+        """Return the lowercased extension of a filename, including the dot.
+        
+        Slices from the last dot instead of going through os.path.splitext; a name
+        without a dot yields a string that is never an allowed extension.
+        """
+        return filename[filename.rfind('.'):].lower()
+    
+    @staticmethod
+    def _validate_file(file: UploadFile) -> Tuple[str, Optional[int]]:
+        """Validate uploaded file and return its extension and declared size"""
         if not file.filename:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,103 +148,214 @@ class FileService:
             )
         
         # Check file extension
-        file_extension = Path(file.filename).suffix.lower()
+        file_extension = FileService._get_file_extension(file.filename)
         if file_extension not in FileService.ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type {file_extension} not allowed. Allowed types: {', '.join(FileService.ALLOWED_EXTENSIONS)}"
+                detail=f"File type {file_extension} not allowed. Allowed types: {FileService._ALLOWED_EXTENSIONS_STR}"
             )
         
         # Check file size (10MB limit)
-        if hasattr(file, 'size') and file.size > 10 * 1024 * 1024:
+        file_size = getattr(file, 'size', None)
+        if file_size is not None and file_size > 10 * 1024 * 1024:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File size exceeds 10MB limit"
             )
+        
+        return file_extension, file_size
 
     @staticmethod
     def _calculate_file_hash(content: bytes) -> str:
         """Calculate SHA-256 hash of file content"""
-        return hashlib.sha256(content).hexdigest()
+        hasher = _sha256()
+        hasher.update(content)
+        return hasher.hexdigest()
 
     @staticmethod
-    def _check_duplicate_file(db: Session, project_id: UUID, file_hash: str, file_name: str) -> Optional[File]:
-        """Check if file with same hash or name already exists in project"""
-        # Check for exact hash match (same content)
-        existing_file = db.query(File).filter(
-            File.project_id == project_id,
-            File.file_hash == file_hash
-        ).first()
+    def _hash_stream(source: BinaryIO) -> Tuple[str, int]:
+        """Compute SHA-256 hash and size of a stream in fixed-size chunks (blocking)"""
+        hasher = _sha256()
+        total = 0
+        source.seek(0)
+        readinto = getattr(source, "readinto", None)
+        if readinto is not None:
+            # Read into this thread's reusable buffer instead of allocating a new chunk per read
+            buffer = getattr(_hash_buffers, "buffer", None)
+            if buffer is None:
+                buffer = _hash_buffers.buffer = bytearray(FileService.UPLOAD_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                read = readinto(view)
+                if not read:
+                    break
+                hasher.update(view[:read])
+                total += read
+        else:
+            while True:
+                chunk = source.read(FileService.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                total += len(chunk)
+        source.seek(0)
         
-        if existing_file:
-            return existing_file
+        return hasher.hexdigest(), total
+
+    @staticmethod
+    def _hash_upload(file: UploadFile) -> "asyncio.Future[Tuple[str, int]]":
+        """Start hashing an upload from its spooled file in a worker thread.
+        
+        The work is submitted immediately, so it overlaps with whatever the caller
+        does before awaiting the returned future.
+        """
+        return asyncio.get_running_loop().run_in_executor(_hash_executor, FileService._hash_stream, file.file)
+
+    @staticmethod
+    def lock_stored_content(db: Session, file_hashes: Iterable[Optional[str]]) -> None:
+        """Serialize reuse and deletion of stored content by hash until the transaction ends.
+        
+        Takes transaction-scoped Postgres advisory locks (in sorted order, so concurrent
+        callers cannot deadlock). Uploads hold them from the duplicate lookup until their
+        File rows commit, and deletes hold them from the reference check until the rows
+        are gone, so a path can never be reused while its last reference is being deleted.
+        """
+        for file_hash in sorted({file_hash for file_hash in file_hashes if file_hash}):
+            db.execute(select(func.pg_advisory_xact_lock(
+                func.hashtextextended(f"file_content:{file_hash}", 0)
+            )))
+
+    @staticmethod
+    def _is_storage_shared(db: Session, file: File) -> bool:
+        """Check if another file record references the same stored object"""
+        return db.query(File.id).filter(
+            File.storage_path == file.storage_path,
+            File.id != file.id
+        ).first() is not None
+
+    @staticmethod
+    def _get_content_type(file_extension: str) -> str:
+        """Map a file extension to its MIME content type"""
+        return _CONTENT_TYPES.get(file_extension, 'application/octet-stream')
+
+    @staticmethod
+    async def _store_content(unique_filename: str, source: BinaryIO, content_type: str) -> str:
+        """Upload content to storage (Supabase or local) without blocking the event loop"""
+        if FileService._should_use_supabase():
+            try:
+                # Upload to Supabase Storage
+                storage_path = await asyncio.to_thread(
+                    FileService._upload_to_supabase, unique_filename, source, content_type
+                )
+                logger.info("File uploaded to Supabase: %s", storage_path)
+            except Exception as e:
+                logger.warning("Supabase upload failed, falling back to local storage: %s", e)
+                # Fallback to local storage if Supabase fails
+                local_path = os.path.join("uploads", unique_filename)
+                
+                try:
+                    await asyncio.to_thread(FileService._write_local_file, local_path, source)
+                    storage_path = local_path
+                    logger.info("File saved locally: %s", storage_path)
+                except Exception as local_e:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=f"Failed to save file: {str(local_e)}"
+                    )
+        else:
+            # Use local storage
+            local_path = os.path.join("uploads", unique_filename)
             
-        # Check for same filename (different content but same name)
-        existing_file_by_name = db.query(File).filter(
-            File.project_id == project_id,
-            File.file_name == file_name
+            try:
+                await asyncio.to_thread(FileService._write_local_file, local_path, source)
+                storage_path = local_path
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to save file locally: {str(e)}"
+                )
+        
+        return storage_path
+
+    @staticmethod
+    def _check_duplicate_file(
+        db: Session, project_id: UUID, user_id: UUID, file_hash: str, file_name: str
+    ) -> Tuple[Optional[File], Optional[str]]:
+        """Check for a file with the same hash or name in the project, and for stored identical content.
+        
+        Returns the conflicting project file (if any) and, when there is no conflict,
+        the storage path of identical content already stored in another of the user's
+        projects (if any). Content is never reused across owners, so a returned path
+        never reveals another user's data. Both answers come from a single indexed query.
+        """
+        in_project = File.project_id == project_id
+        same_content = File.file_hash == file_hash
+        match = db.query(File).join(Project, Project.id == File.project_id).filter(
+            Project.owner_id == user_id,
+            or_(same_content, and_(in_project, File.file_name == file_name))
+        ).order_by(
+            # Project matches first, preferring exact hash match (same content) over same filename;
+            # legacy rows without a hash compare as NULL, which DESC would otherwise sort first
+            in_project.desc(), same_content.desc().nullslast()
         ).first()
         
-        return existing_file_by_name
+        if match is None:
+            return None, None
+        if match.project_id == project_id:
+            return match, None
+        return None, match.storage_path
     
     @staticmethod
-    def _verify_project_ownership(db: Session, project_id: UUID, user_id: UUID) -> Project:
-        """Verify that the project belongs to the user"""
-        project = db.query(Project).filter(
-            Project.id == project_id,
-            Project.owner_id == user_id
-        ).first()
+    def _check_project_ownership(db: Session, project_id: UUID, user_id: UUID) -> None:
+        """Verify that the project belongs to the user using an EXISTS query"""
+        owned = db.query(
+            db.query(Project.id).filter(
+                Project.id == project_id,
+                Project.owner_id == user_id
+            ).exists()
+        ).scalar()
         
-        if not project:
+        if not owned:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found or access denied"
             )
-        
-        return project
     
     @staticmethod
     async def upload_file(
         db: Session, 
         project_id: UUID, 
         file: UploadFile, 
-        user_id: UUID
+        user_id: UUID,
+        background_tasks: BackgroundTasks
     ) -> FileUploadResponse:
         """Upload file and save metadata"""
         
         # Validate file
-        FileService._validate_file(file)
-        
-        # Verify project ownership
-        project = FileService._verify_project_ownership(db, project_id, user_id)
+        file_extension, _ = FileService._validate_file(file)
         
-        # Generate unique filename with project prefix
-        file_extension = Path(file.filename).suffix.lower()
-        unique_filename = f"project_{project_id}/{uuid.uuid4()}{file_extension}"
+        # Hash file content in the background while the ownership check hits the database
+        hash_future = FileService._hash_upload(file)
         
-        # Determine content type
-        content_type_map = {
-            '.pdf': 'application/pdf',
-            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            '.doc': 'application/msword'
-        }
-        content_type = content_type_map.get(file_extension, 'application/octet-stream')
+        # Verify project ownership
+        try:
+            FileService._check_project_ownership(db, project_id, user_id)
+        except HTTPException:
+            await asyncio.gather(hash_future, return_exceptions=True)
+            raise
         
-        # Read file content
+        # Collect the file hash for duplicate detection
         try:
-            content = await file.read()
-            file_size = len(content)
+            file_hash, file_size = await hash_future
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to read file: {str(e)}"
             )
         
-        # Calculate file hash for duplicate detection
-        file_hash = FileService._calculate_file_hash(content)
-        
-        # Check for duplicates
-        existing_file = FileService._check_duplicate_file(db, project_id, file_hash, file.filename)
+        # Check for duplicates, holding the content lock until the new row commits
+        FileService.lock_stored_content(db, [file_hash])
+        existing_file, storage_path = FileService._check_duplicate_file(db, project_id, user_id, file_hash, file.filename)
         if existing_file:
             if existing_file.file_hash == file_hash:
                 raise HTTPException(
@@ -153,103 +368,227 @@ class FileService:
                     detail=f"A file named '{file.filename}' already exists in this project. Please rename your file or choose a different document to avoid conflicts."
                 )
         
-        # Upload to storage (Supabase or local)
-        if FileService._should_use_supabase():
-            try:
-                # Upload to Supabase Storage
-                storage_path = supabase_storage.upload_file(unique_filename, content, content_type)
-                print(f"File uploaded to Supabase: {storage_path}")
-            except Exception as e:
-                print(f"Supabase upload failed, falling back to local storage: {e}")
-                # Fallback to local storage if Supabase fails
-                FileService._create_upload_directory()
-                local_path = os.path.join("uploads", unique_filename)
-                os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                
-                try:
-                    with open(local_path, "wb") as buffer:
-                        buffer.write(content)
-                    storage_path = local_path
-                    print(f"File saved locally: {storage_path}")
-                except Exception as local_e:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Failed to save file: {str(local_e)}"
-                    )
+        # Identical content already stored in another of the user's projects is reused instead of uploaded again
+        if storage_path:
+            logger.info("Reusing stored content for %s: %s", file.filename, storage_path)
         else:
-            # Use local storage
-            FileService._create_upload_directory()
-            local_path = os.path.join("uploads", unique_filename)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            
-            try:
-                with open(local_path, "wb") as buffer:
-                    buffer.write(content)
-                storage_path = local_path
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to save file locally: {str(e)}"
-                )
+            # Generate unique filename with project prefix only when content is actually stored
+            unique_filename = f"project_{project_id}/{uuid.uuid4()}{file_extension}"
+            content_type = FileService._get_content_type(file_extension)
+            storage_path = await FileService._store_content(unique_filename, file.file, content_type)
         
-        # Save metadata to database
+        # Save file metadata and its AI job in a single transaction. All values are
+        # generated client-side, so no refresh SELECT is needed after the commit
+        file_id = uuid.uuid4()
+        created_at = datetime.now(timezone.utc)
         db_file = File(
+            id=file_id,
             project_id=project_id,
             file_name=file.filename,
             storage_path=storage_path,
             uploaded_by=user_id,
             file_hash=file_hash,
-            file_size=str(file_size)
+            file_size=str(file_size),
+            created_at=created_at
         )
-        
         db.add(db_file)
-        db.commit()
-        db.refresh(db_file)
         
-        # Create AI job for processing
-        ai_job = AIJobService.create_ai_job(
+        db_job = AIJobService._create_ai_job_row(
             db=db,
             job_data=AIJobCreate(
                 project_id=project_id,
-                file_id=db_file.id
+                file_id=file_id
             )
         )
+        job_id = db_job.id
+        
+        db.commit()
+        
+        # Publish to Celery after the response is sent; the job row is already committed
+        background_tasks.add_task(AIJobService.schedule_ai_jobs_background, [job_id])
         
         return FileUploadResponse(
-            id=db_file.id,
-            project_id=db_file.project_id,
-            file_name=db_file.file_name,
-            storage_path=db_file.storage_path,
-            uploaded_by=db_file.uploaded_by,
-            file_hash=db_file.file_hash,
+            id=file_id,
+            project_id=project_id,
+            file_name=file.filename,
+            storage_path=storage_path,
+            uploaded_by=user_id,
+            file_hash=file_hash,
             file_size=int(file_size) if file_size else None,
-            created_at=db_file.created_at,
-            message=f"File uploaded successfully. AI job created with ID: {ai_job.id}"
+            created_at=created_at,
+            message=f"File uploaded; AI job pending with ID: {job_id}"
+        )
+    
+    @staticmethod
+    async def upload_files_bulk(
+        db: Session,
+        project_id: UUID,
+        files: List[UploadFile],
+        user_id: UUID,
+        background_tasks: BackgroundTasks
+    ) -> List[FileUploadResponse]:
+        """Upload several files and save their metadata and AI jobs in a single transaction"""
+        
+        # Validate files
+        file_extensions = [FileService._validate_file(file)[0] for file in files]
+        
+        # Hash all files in the background while the ownership check hits the database
+        hash_futures = [FileService._hash_upload(file) for file in files]
+        
+        # Verify project ownership
+        try:
+            FileService._check_project_ownership(db, project_id, user_id)
+        except HTTPException:
+            await asyncio.gather(*hash_futures, return_exceptions=True)
+            raise
+        
+        # Collect the file hashes
+        try:
+            hash_results = await asyncio.gather(*hash_futures)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to read file: {str(e)}"
+            )
+        
+        file_names = [file.filename for file in files]
+        file_hashes = [file_hash for file_hash, _ in hash_results]
+        
+        # Reject duplicates within the batch itself
+        if len(set(file_names)) != len(file_names):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The selected files contain the same file name more than once. Please rename your files to avoid conflicts."
+            )
+        if len(set(file_hashes)) != len(file_hashes):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The selected files contain identical documents. Please remove the duplicates to continue."
+            )
+        
+        # Hold the content locks until the new rows commit, so reused paths can't be deleted meanwhile
+        FileService.lock_stored_content(db, file_hashes)
+        
+        # Check for duplicates already in the project with a single query
+        existing_file = db.query(File).filter(
+            File.project_id == project_id,
+            or_(File.file_hash.in_(file_hashes), File.file_name.in_(file_names))
+        ).first()
+        if existing_file:
+            if existing_file.file_hash in file_hashes:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"One of the selected files has already been uploaded to your project. The system detected identical content from '{existing_file.file_name}'. Please remove it to continue."
+                )
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"A file named '{existing_file.file_name}' already exists in this project. Please rename your file or choose a different document to avoid conflicts."
+                )
+        
+        # Look up content already stored in any of the user's projects with a single query
+        # (never across owners, since the reused path is returned to the uploader)
+        stored_paths = dict(
+            db.query(File.file_hash, File.storage_path).join(
+                Project, Project.id == File.project_id
+            ).filter(
+                Project.owner_id == user_id,
+                File.file_hash.in_(file_hashes)
+            ).distinct(File.file_hash)
         )
+        
+        # Upload new content to storage concurrently, bounded to avoid flooding the backend
+        semaphore = asyncio.Semaphore(FileService.UPLOAD_CONCURRENCY)
+        storage_prefix = f"project_{project_id}/"
+        
+        async def store(file: UploadFile, file_extension: str, file_hash: str) -> str:
+            storage_path = stored_paths.get(file_hash)
+            if storage_path:
+                return storage_path
+            unique_filename = f"{storage_prefix}{uuid.uuid4()}{file_extension}"
+            async with semaphore:
+                return await FileService._store_content(
+                    unique_filename, file.file, FileService._get_content_type(file_extension)
+                )
+        
+        storage_paths = await asyncio.gather(*[
+            store(file, file_extension, file_hash)
+            for file, file_extension, file_hash in zip(files, file_extensions, file_hashes)
+        ])
+        
+        # Save all file and AI job rows with two bulk INSERTs and one commit
+        created_at = datetime.now(timezone.utc)
+        file_rows = []
+        job_rows = []
+        for file, (file_hash, file_size), storage_path in zip(files, hash_results, storage_paths):
+            file_id = uuid.uuid4()
+            file_rows.append({
+                "id": file_id,
+                "project_id": project_id,
+                "file_name": file.filename,
+                "storage_path": storage_path,
+                "uploaded_by": user_id,
+                "file_hash": file_hash,
+                "file_size": str(file_size),
+                "created_at": created_at
+            })
+            job_rows.append({
+                "id": uuid.uuid4(),
+                "project_id": project_id,
+                "file_id": file_id,
+                "status": JobStatus.QUEUED,
+                "progress": 0
+            })
+        
+        db.bulk_insert_mappings(File, file_rows)
+        db.bulk_insert_mappings(AIJob, job_rows)
+        db.commit()
+        
+        # Publish all AI jobs to Celery after the response is sent; the rows are already committed
+        background_tasks.add_task(AIJobService.schedule_ai_jobs_background, [job["id"] for job in job_rows])
+        
+        return [
+            FileUploadResponse(
+                id=file_row["id"],
+                project_id=project_id,
+                file_name=file_row["file_name"],
+                storage_path=file_row["storage_path"],
+                uploaded_by=user_id,
+                file_hash=file_row["file_hash"],
+                file_size=int(file_row["file_size"]),
+                created_at=created_at,
+                message=f"File uploaded; AI job pending with ID: {job_row['id']}"
+            )
+            for file_row, job_row in zip(file_rows, job_rows)
+        ]
     
     @staticmethod
     def get_project_files(db: Session, project_id: UUID, user_id: UUID) -> List[File]:
         """Get all files for a project"""
-        # Verify project ownership
-        FileService._verify_project_ownership(db, project_id, user_id)
+        # Resolve ownership through the join so the common case is a single query
+        files = db.query(File).join(Project, Project.id == File.project_id).filter(
+            File.project_id == project_id,
+            Project.owner_id == user_id
+        ).order_by(File.created_at.desc()).all()
+        
+        # An empty result is either an empty project or no access; only then check ownership
+        if not files:
+            FileService._check_project_ownership(db, project_id, user_id)
         
-        return db.query(File).filter(File.project_id == project_id).order_by(File.created_at.desc()).all()
+        return files
     
     @staticmethod
     def get_file(db: Session, file_id: UUID, user_id: UUID) -> Optional[File]:
         """Get a specific file by ID with ownership validation"""
-        file = db.query(File).filter(File.id == file_id).first()
-        
-        if not file:
-            return None
-        
-        # Verify project ownership through the file's project
-        FileService._verify_project_ownership(db, file.project_id, user_id)
-        
-        return file
+        # Resolve ownership through the file's project in the same query; a file the
+        # user does not own is indistinguishable from a missing one
+        return db.query(File).join(Project, Project.id == File.project_id).filter(
+            File.id == file_id,
+            Project.owner_id == user_id
+        ).first()
     
     @staticmethod
-    def delete_file(db: Session, file_id: UUID, user_id: UUID) -> bool:
+    async def delete_file(db: Session, file_id: UUID, user_id: UUID) -> bool:
         """Delete a file and its associated AI jobs."""
         file = FileService.get_file(db, file_id, user_id)
         
@@ -257,42 +596,46 @@ class FileService:
             return False
         
         try:
-            # Delete the physical file from storage
-            if file.storage_path:
-                if file.storage_path.startswith('http'):
-                    # It's a Supabase URL, extract the file path and delete from Supabase
-                    if supabase_storage.is_available():
-                        # Extract file path from URL (assuming URL format: .../{bucket_name}/{file_path})
-                        try:
-                            # Get the path part after the bucket name
-                            url_parts = file.storage_path.split('/')
-                            if 'requirement-files' in url_parts:
-                                bucket_index = url_parts.index('requirement-files')
-                                file_path = '/'.join(url_parts[bucket_index + 1:])
-                                supabase_storage.delete_file(file_path)
-                                print(f"Deleted file from Supabase: {file_path}")
-                        except Exception as e:
-                            print(f"Failed to delete from Supabase: {e}")
-                elif os.path.exists(file.storage_path):
-                    # It's a local file path
-                    os.remove(file.storage_path)
-                    print(f"Deleted local file: {file.storage_path}")
+            # Lock the content so no upload can start reusing it between the reference
+            # check and the delete; the lock is released by the commit below
+            FileService.lock_stored_content(db, [file.file_hash])
+            remove_stored_object = bool(file.storage_path) and not FileService._is_storage_shared(db, file)
+            storage_path = file.storage_path
             
-            # Delete associated AI jobs (they should cascade due to foreign key constraints)
-            from app.db.models.ai_job import AIJob
-            ai_jobs = db.query(AIJob).filter(AIJob.file_id == file_id).all()
-            for job in ai_jobs:
-                db.delete(job)
+            # Delete associated AI jobs in a single statement (ai_jobs.file_id has no ON DELETE CASCADE)
+            db.query(AIJob).filter(AIJob.file_id == file_id).delete(synchronize_session=False)
             
-            # Delete the file record
-            db.delete(file)
+            # Delete the file record directly; an ORM delete would first load
+            # file.ai_jobs to null out their foreign keys
+            db.query(File).filter(File.id == file_id).delete(synchronize_session=False)
             db.commit()
             
-            return True
-            
         except Exception as e:
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to delete file: {str(e)}"
             )
+        
+        # Delete the physical file now that no record references it; uploads that were
+        # waiting on the lock no longer find this path, so they store their own copy
+        if remove_stored_object:
+            try:
+                if storage_path.startswith('http'):
+                    # It's a Supabase URL, extract the file path and delete from Supabase
+                    if FileService._should_use_supabase():
+                        # Extract file path from URL (assuming URL format: .../{bucket_name}/{file_path})
+                        url_parts = storage_path.split('/')
+                        if 'requirement-files' in url_parts:
+                            bucket_index = url_parts.index('requirement-files')
+                            file_path = '/'.join(url_parts[bucket_index + 1:])
+                            await asyncio.to_thread(supabase_storage.delete_file, file_path)
+                            logger.info("Deleted file from Supabase: %s", file_path)
+                elif await asyncio.to_thread(os.path.exists, storage_path):
+                    # It's a local file path
+                    await asyncio.to_thread(os.remove, storage_path)
+                    logger.info("Deleted local file: %s", storage_path)
+            except Exception as e:
+                logger.warning("Failed to delete stored file %s: %s", storage_path, e)
+        
+        return True
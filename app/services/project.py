@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session, make_transient_to_detached
 from fastapi import HTTPException, status
 
 from app.db.models.project import Project
@@ -8,18 +9,30 @@ from app.schemas.project import ProjectCreate, ProjectUpdate
 
 
 class ProjectService:
+    @staticmethod
+    def _project_from_row(db: Session, row) -> Project:
+        """Attach a Project built from a RETURNING row to the session without another SELECT.
+        
+        The instance is persistent and clean (merged into any copy already in the session),
+        so relationships, refresh and attribute updates work as on a queried Project.
+        """
+        db_project = Project(**row._mapping)
+        make_transient_to_detached(db_project)
+        return db.merge(db_project, load=False)
+
     @staticmethod
     def create_project(db: Session, project: ProjectCreate, user_id: UUID) -> Project:
         """Create a new project for the given user."""
-        db_project = Project(
-            name=project.name,
-            description=project.description,
-            owner_id=user_id
-        )
-        db.add(db_project)
+        # INSERT ... RETURNING hands back server defaults without a refresh SELECT
+        row = db.execute(
+            insert(Project).values(
+                name=project.name,
+                description=project.description,
+                owner_id=user_id
+            ).returning(*Project.__table__.c)
+        ).one()
         db.commit()
-        db.refresh(db_project)
-        return db_project
+        return ProjectService._project_from_row(db, row)
 
     @staticmethod
     def get_project(db: Session, project_id: UUID, user_id: UUID) -> Optional[Project]:
@@ -126,63 +139,86 @@ class ProjectService:
     @staticmethod
     def update_project(db: Session, project_id: UUID, project_update: ProjectUpdate, user_id: UUID) -> Optional[Project]:
         """Update a project, ensuring it belongs to the user."""
-        project = db.query(Project).filter(
-            Project.id == project_id,
-            Project.owner_id == user_id
-        ).first()
+        update_data = project_update.dict(exclude_unset=True)
+        if not update_data:
+            return ProjectService.get_project(db, project_id, user_id)
         
-        if not project:
+        # Ownership check and write in one atomic UPDATE ... RETURNING
+        row = db.execute(
+            update(Project).where(
+                Project.id == project_id,
+                Project.owner_id == user_id
+            ).values(**update_data).returning(*Project.__table__.c)
+        ).one_or_none()
+        
+        if not row:
+            db.rollback()
             return None
             
-        update_data = project_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(project, field, value)
-            
         db.commit()
-        db.refresh(project)
-        return project
+        # Same ORM type as the no-op path above (refreshing any copy already in the session)
+        return ProjectService._project_from_row(db, row)
 
     @staticmethod
     def delete_project(db: Session, project_id: UUID, user_id: UUID) -> bool:
         """Delete a project and all related data, ensuring it belongs to the user."""
-        project = db.query(Project).filter(
-            Project.id == project_id,
-            Project.owner_id == user_id
-        ).first()
-        
-        if not project:
-            return False
-        
         try:
             # Import here to avoid circular imports
             from app.db.models.file import File
+            from app.services.file_processing import FileService
             
-            # Delete physical files from storage before deleting project
+            # Collect stored objects to remove once the delete has committed
             # (Database cascade will handle the database records)
-            files = db.query(File).filter(File.project_id == project_id).all()
-            for file in files:
-                try:
-                    import os
-                    if file.storage_path and os.path.exists(file.storage_path):
-                        os.remove(file.storage_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete physical file {file.storage_path}: {e}")
+            project_files = db.query(File.storage_path, File.file_hash).join(Project).filter(
+                File.project_id == project_id,
+                Project.owner_id == user_id
+            ).all()
+            storage_paths = {path for path, _ in project_files if path}
+            
+            # Lock the content so no upload can start reusing these paths between the
+            # shared check and the delete; the locks are released by the commit below
+            FileService.lock_stored_content(db, (file_hash for _, file_hash in project_files))
+            # Content deduplicated across projects shares one stored object
+            shared_paths = {
+                path for (path,) in db.query(File.storage_path).filter(
+                    File.storage_path.in_(storage_paths),
+                    File.project_id != project_id
+                ).distinct()
+            } if storage_paths else set()
             
-            # Delete the project - database cascade will automatically delete:
-            # - All work_items related to this project
-            # - All ai_jobs related to this project  
-            # - All files related to this project
-            db.delete(project)
+            # Ownership check and delete in one atomic DELETE ... RETURNING - the
+            # ON DELETE CASCADE foreign keys remove work_items, ai_jobs and files
+            # without the ORM loading and deleting each child row
+            deleted = db.execute(
+                delete(Project).where(
+                    Project.id == project_id,
+                    Project.owner_id == user_id
+                ).returning(Project.id)
+            ).first()
+            
+            if not deleted:
+                db.rollback()
+                return False
             
             # Commit all changes
             db.commit()
-            return True
             
         except Exception as e:
             # Rollback on any error
             db.rollback()
             print(f"Error deleting project {project_id}: {e}")
             return False
+        
+        # Delete physical files from storage now that the records are gone
+        import os
+        for storage_path in storage_paths - shared_paths:
+            try:
+                if os.path.exists(storage_path):
+                    os.remove(storage_path)
+            except Exception as e:
+                print(f"Warning: Could not delete physical file {storage_path}: {e}")
+        
+        return True
 
     @staticmethod
     def toggle_project_active_status(db: Session, project_id: UUID, user_id: UUID, active: bool) -> Optional[Project]:
@@ -1,13 +1,23 @@
 import os
+import re
+import asyncio
+import hashlib
+import threading
 import uuid
-from typing import List, Dict, Any, Optional
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 from uuid import UUID
+import numpy as np
+import torch
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-import requests
+import httpx
 import google.generativeai as genai
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 
 from app.core.config import settings
 
@@ -18,8 +28,17 @@ from app.db.models.project import Project
 from app.utils.pdf_utils import PDFExtractor
 from app.utils.docx_utils import DOCXExtractor
 
+# Sentence and paragraph ends used as preferred chunk break points
+_CHUNK_BOUNDARY_RE = re.compile(r"[.\n]")
+
 
 class RAGService:
+    # Chunks embedded and added to ChromaDB per call when indexing a single document
+    INDEX_BATCH_SIZE = 256
+    
+    # Maximum number of cached query embeddings
+    QUERY_CACHE_MAX_SIZE = 2048
+    
     def __init__(self):
         """Initialize RAG service with ChromaDB and embedding model."""
         # Initialize ChromaDB client
@@ -34,9 +53,22 @@ class RAGService:
             )
         )
         
+        # Collection handles by name, so lookups skip the metadata store after first use
+        self._collection_cache: Dict[str, chromadb.Collection] = {}
+        
+        # LRU cache of query embeddings keyed by a digest of the normalized query
+        self._query_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
         # Initialize embedding model
         try:
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            if device == "cpu":
+                # Cap intra-op threads so encode doesn't oversubscribe cores shared with workers
+                torch.set_num_threads(min(8, os.cpu_count() or 1))
+            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+            if settings.embedding_quantize_int8 and device == "cpu":
+                self._quantize_embedding_model()
         except Exception as e:
             print(f"Warning: Could not load embedding model: {e}")
             self.embedding_model = None
@@ -45,145 +77,371 @@ class RAGService:
         if settings.gemini_api_key:
             genai.configure(api_key=settings.gemini_api_key)
         
+        # Pooled keep-alive client for LLM fallback calls, reusing TLS connections
+        self._http = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._http.aclose()
+        
+    def _quantize_embedding_model(self) -> None:
+        """Swap the model's Linear layers for dynamic int8 versions (CPU only).
+        
+        Roughly halves encode time on CPUs with int8 dot-product support at a small
+        cost in embedding precision, so it is opt-in via EMBEDDING_QUANTIZE_INT8.
+        """
+        try:
+            torch.quantization.quantize_dynamic(
+                self.embedding_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        except Exception as e:
+            print(f"Warning: Could not quantize embedding model, using FP32: {e}")
+        
+    @contextmanager
+    def _bulk_mode(self):
+        """Relax ChromaDB's SQLite durability settings for a bulk indexing run.
+        
+        Applies synchronous=OFF and temp_store=MEMORY to this thread's SQLite
+        connection and restores the previous values afterwards. Journal and locking
+        modes are left alone so concurrent readers keep working. This reaches into
+        chromadb internals, so it silently does nothing if they are not available.
+        """
+        cursor = None
+        previous = {}
+        try:
+            sysdb = self.chroma_client._server._sysdb
+            cursor = sysdb._conn_pool.connect().cursor()
+            for pragma, value in (("synchronous", "OFF"), ("temp_store", "MEMORY")):
+                previous[pragma] = cursor.execute(f"PRAGMA {pragma}").fetchone()[0]
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        except Exception as e:
+            print(f"Warning: Could not enable ChromaDB bulk mode: {e}")
+        
+        try:
+            yield
+        finally:
+            for pragma, value in previous.items():
+                try:
+                    cursor.execute(f"PRAGMA {pragma} = {value}")
+                except Exception as e:
+                    print(f"Warning: Could not restore ChromaDB PRAGMA {pragma}: {e}")
+    
     def _get_or_create_collection(self, project_id: str) -> chromadb.Collection:
         """Get or create a ChromaDB collection for a project."""
         collection_name = f"project_{project_id}"
-        try:
-            # Try to get existing collection
-            return self.chroma_client.get_collection(name=collection_name)
-        except Exception:
-            # Create new collection if it doesn't exist
-            return self.chroma_client.create_collection(
+        collection = self._collection_cache.get(collection_name)
+        if collection is None:
+            collection = self.chroma_client.get_or_create_collection(
                 name=collection_name,
                 metadata={"project_id": project_id}
             )
+            self._collection_cache[collection_name] = collection
+        return collection
     
-    def _extract_text_from_file(self, file_path: str, file_name: str) -> str:
-        """Extract text content from uploaded file."""
-        try:
-            if file_name.lower().endswith('.pdf'):
-                return PDFExtractor.extract_text_from_pdf(file_path)
-            elif file_name.lower().endswith(('.docx', '.doc')):
-                return DOCXExtractor.extract_text_from_docx(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_name}")
-        except Exception as e:
-            print(f"Error extracting text from {file_name}: {e}")
-            return ""
+    def _iter_text_from_file(self, file_path: str, file_name: str) -> Iterator[str]:
+        """Yield text content of an uploaded file in blocks (one per page for PDFs)."""
+        if file_name.lower().endswith('.pdf'):
+            for page_text in PDFExtractor.iter_text_by_pages(file_path):
+                yield page_text + "\n"
+        elif file_name.lower().endswith(('.docx', '.doc')):
+            yield DOCXExtractor.extract_text_from_docx(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_name}")
     
-    def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into overlapping chunks."""
-        if not text.strip():
-            return []
+    def _chunk_text_stream(self, blocks: Iterable[str], chunk_size: int = 1000, overlap: int = 200) -> Iterator[str]:
+        """Split a stream of text blocks into overlapping chunks.
         
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
+        Only the unfinished tail of the text is kept between blocks, so memory stays
+        bounded by the largest block rather than the whole document.
+        """
+        def chunk_end(boundaries: List[int], start: int, text_length: int) -> int:
             end = start + chunk_size
-            chunk = text[start:end]
             
             # Find a good breaking point (end of sentence or paragraph)
             if end < text_length:
-                last_period = chunk.rfind('.')
-                last_newline = chunk.rfind('\n')
-                break_point = max(last_period, last_newline)
-                
-                if break_point > start + chunk_size // 2:
-                    chunk = text[start:break_point + 1]
-                    end = break_point + 1
-            
-            chunks.append(chunk.strip())
+                index = bisect_left(boundaries, end) - 1
+                if index >= 0 and boundaries[index] > start + chunk_size // 2:
+                    end = boundaries[index] + 1
+            return end
+        
+        # Find every sentence/paragraph boundary in one regex scan per buffer, then
+        # snap each chunk end to the last boundary past its midpoint with a binary search
+        buffer = ""
+        for block in blocks:
+            buffer += block
+            start = 0
+            boundaries = None
+            # Emit chunks whose window is complete; the rest waits for more text
+            while start + chunk_size < len(buffer):
+                if boundaries is None:
+                    boundaries = [match.start() for match in _CHUNK_BOUNDARY_RE.finditer(buffer)]
+                end = chunk_end(boundaries, start, len(buffer))
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield chunk
+                start = end - overlap
+            buffer = buffer[start:]
+        
+        boundaries = [match.start() for match in _CHUNK_BOUNDARY_RE.finditer(buffer)]
+        start = 0
+        text_length = len(buffer)
+        
+        while start < text_length:
+            end = chunk_end(boundaries, start, text_length)
+            chunk = buffer[start:end].strip()
+            if chunk:
+                yield chunk
+            if end >= text_length:
+                break
             start = end - overlap
-            
-        return [chunk for chunk in chunks if chunk.strip()]
     
-    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for text chunks."""
-        if not self.embedding_model:
+    def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+        """Split text into overlapping chunks."""
+        return list(self._chunk_text_stream([text], chunk_size, overlap))
+    
+    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for text chunks as a (len(texts), 384) float32 array."""
+        if not self.embedding_model or not texts:
             # Fallback to dummy embeddings if model not available
-            return [[0.0] * 384 for _ in texts]
+            return np.zeros((len(texts), 384), dtype=np.float32)
         
         try:
-            embeddings = self.embedding_model.encode(texts)
-            return embeddings.tolist()
+            # encode() already sorts inputs by length and restores the original order,
+            # so a larger batch size keeps padding low while cutting per-batch dispatch.
+            # inference_mode also skips autograd version tracking on every tensor op.
+            with torch.inference_mode():
+                embeddings = self.embedding_model.encode(
+                    texts,
+                    batch_size=settings.embedding_batch_size,
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
+            return embeddings.astype(np.float32, copy=False)
         except Exception as e:
             print(f"Error generating embeddings: {e}")
-            return [[0.0] * 384 for _ in texts]
+            return np.zeros((len(texts), 384), dtype=np.float32)
+    
+    def _iter_document_chunks(self, file_obj: File) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Extract and chunk a file lazily, yielding (chunk id, text, metadata) for ChromaDB."""
+        # Hoist per-file values out of the per-chunk loop (ORM attribute access is not free)
+        file_id = str(file_obj.id)
+        file_name = file_obj.file_name
+        project_id = str(file_obj.project_id)
+        # Reuse text already extracted by the AI job instead of re-parsing the upload
+        cached_text = file_obj.extracted_text
+        if cached_text:
+            blocks = iter((cached_text,))
+        else:
+            blocks = self._iter_text_from_file(file_obj.storage_path, file_name)
+        for i, chunk in enumerate(self._chunk_text_stream(blocks)):
+            yield f"{file_id}_{i}", chunk, {
+                "file_id": file_id,
+                "file_name": file_name,
+                "project_id": project_id,
+                "chunk_index": i,
+                "chunk_size": len(chunk)
+            }
+    
+    def _prepare_document_chunks(self, file_obj: File) -> Optional[Dict[str, list]]:
+        """Extract and chunk a file, returning chunk ids, texts and metadata for ChromaDB."""
+        rows = list(self._iter_document_chunks(file_obj))
+        if not rows:
+            print(f"Warning: No text chunks created from {file_obj.file_name}")
+            return None
+        
+        # Transpose the (id, text, metadata) rows into the column lists ChromaDB expects
+        ids, documents, metadatas = (list(column) for column in zip(*rows))
+        return {"ids": ids, "documents": documents, "metadatas": metadatas}
+    
+    def _count_tokens(self, texts: List[str]) -> Optional[List[int]]:
+        """Return per-text token counts from one batched fast-tokenizer call."""
+        if not self.embedding_model or not texts:
+            return None
+        try:
+            return self.embedding_model.tokenizer(
+                texts,
+                add_special_tokens=False,
+                return_length=True,
+                return_attention_mask=False
+            )["length"]
+        except Exception as e:
+            print(f"Warning: Could not count tokens: {e}")
+            return None
+    
+    def _add_chunks(self, project_id: str, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Embed chunks with one encode call and add them to the project's collection."""
+        # Record token counts once at index time so retrieval can rank or batch
+        # by length without re-tokenizing stored chunks
+        token_counts = self._count_tokens(documents)
+        if token_counts is not None:
+            for metadata, token_count in zip(metadatas, token_counts):
+                metadata["token_count"] = int(token_count)
+        
+        # Generate embeddings
+        embeddings = self._generate_embeddings(documents)
+        
+        # Get or create collection for the project
+        collection = self._get_or_create_collection(project_id)
+        
+        # Add to ChromaDB collection (this chromadb version only accepts
+        # lists, so convert once here in a single C-level pass)
+        collection.add(
+            embeddings=embeddings.tolist(),
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query as a (1, 384) array, reusing embeddings of repeated questions."""
+        # The embedding model is uncased, so case and surrounding whitespace do not matter
+        key = hashlib.blake2b(query.strip().lower().encode(), digest_size=16).digest()
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return cached
+        
+        embedding = self._generate_embeddings([query])
+        
+        # Do not cache the zero-vector fallback used when encoding fails
+        if embedding.any():
+            embedding.setflags(write=False)
+            with self._query_cache_lock:
+                self._query_cache[key] = embedding
+                if len(self._query_cache) > self.QUERY_CACHE_MAX_SIZE:
+                    self._query_cache.popitem(last=False)
+        return embedding
     
     def index_document(self, db: Session, file_id: UUID, user_id: UUID) -> bool:
         """Index a document in ChromaDB for RAG retrieval."""
         try:
-            # Get file from database
-            file_obj = db.query(File).filter(
+            # Get file from database, verifying project access in the same query
+            file_obj = db.query(File).options(undefer(File.extracted_text)).join(
+                Project, Project.id == File.project_id
+            ).filter(
                 File.id == file_id,
-                File.uploaded_by == user_id
+                File.uploaded_by == user_id,
+                Project.owner_id == user_id
             ).first()
             
             if not file_obj:
                 raise ValueError("File not found or access denied")
             
-            # Verify project access
-            project = db.query(Project).filter(
-                Project.id == file_obj.project_id,
-                Project.owner_id == user_id
-            ).first()
-            
-            if not project:
-                raise ValueError("Project not found or access denied")
-            
-            # Extract text from file
-            text_content = self._extract_text_from_file(
-                file_obj.storage_path, 
-                file_obj.file_name
-            )
-            
-            if not text_content.strip():
-                print(f"Warning: No text content extracted from {file_obj.file_name}")
-                return False
-            
-            # Chunk the text
-            chunks = self._chunk_text(text_content)
-            if not chunks:
+            # Stream pages through the chunker and flush embeddings in batches, so
+            # peak memory is bounded by one batch rather than the whole document
+            project_id = str(file_obj.project_id)
+            batch = {"ids": [], "documents": [], "metadatas": []}
+            total_chunks = 0
+            for chunk_id, chunk, metadata in self._iter_document_chunks(file_obj):
+                batch["ids"].append(chunk_id)
+                batch["documents"].append(chunk)
+                batch["metadatas"].append(metadata)
+                if len(batch["ids"]) >= self.INDEX_BATCH_SIZE:
+                    self._add_chunks(project_id, **batch)
+                    total_chunks += len(batch["ids"])
+                    batch = {"ids": [], "documents": [], "metadatas": []}
+            
+            if batch["ids"]:
+                self._add_chunks(project_id, **batch)
+                total_chunks += len(batch["ids"])
+            
+            if not total_chunks:
                 print(f"Warning: No text chunks created from {file_obj.file_name}")
                 return False
             
-            # Generate embeddings
-            embeddings = self._generate_embeddings(chunks)
-            
-            # Get or create collection for the project
-            collection = self._get_or_create_collection(str(file_obj.project_id))
-            
-            # Create document IDs for chunks
-            chunk_ids = [f"{file_id}_{i}" for i in range(len(chunks))]
-            
-            # Create metadata for each chunk
-            metadatas = []
-            for i, chunk in enumerate(chunks):
-                metadatas.append({
-                    "file_id": str(file_id),
-                    "file_name": file_obj.file_name,
-                    "project_id": str(file_obj.project_id),
-                    "chunk_index": i,
-                    "chunk_size": len(chunk)
-                })
-            
-            # Add to ChromaDB collection
-            collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=metadatas,
-                ids=chunk_ids
-            )
-            
-            print(f"Successfully indexed {len(chunks)} chunks from {file_obj.file_name}")
+            print(f"Successfully indexed {total_chunks} chunks from {file_obj.file_name}")
             return True
             
         except Exception as e:
             print(f"Error indexing document {file_id}: {e}")
             return False
     
+    def index_documents_bulk(
+        self, 
+        db: Session, 
+        file_ids: List[UUID], 
+        user_id: UUID, 
+        project_id: Optional[UUID] = None,
+        batch_size: int = 250
+    ) -> Dict[str, List[str]]:
+        """Index several documents, embedding and adding chunks in batches across files.
+        
+        Chunks are buffered per project and flushed with one encode call and one
+        collection.add once at least batch_size of them are pending, amortizing the
+        per-call ChromaDB transaction cost. Returns the indexed and failed file IDs.
+        """
+        indexed: List[str] = []
+        failed: List[str] = []
+        
+        # Load all accessible files with a single query; cached text is loaded up front
+        # because worker threads must not lazy-load through the shared session
+        query = db.query(File).options(undefer(File.extracted_text)).join(
+            Project, Project.id == File.project_id
+        ).filter(
+            File.id.in_(file_ids),
+            File.uploaded_by == user_id,
+            Project.owner_id == user_id
+        )
+        if project_id is not None:
+            query = query.filter(File.project_id == project_id)
+        files = query.all()
+        found = {str(file_obj.id) for file_obj in files}
+        failed.extend(str(file_id) for file_id in file_ids if str(file_id) not in found)
+        
+        # Pending chunks per project, and the files they belong to
+        buffers: Dict[str, Dict[str, list]] = {}
+        pending_files: Dict[str, List[str]] = {}
+        
+        def flush(collection_project_id: str) -> None:
+            buffer = buffers.pop(collection_project_id)
+            file_batch = pending_files.pop(collection_project_id)
+            try:
+                self._add_chunks(collection_project_id, **buffer)
+                indexed.extend(file_batch)
+            except Exception as e:
+                print(f"Error indexing documents for project {collection_project_id}: {e}")
+                failed.extend(file_batch)
+        
+        # Extract and chunk files in worker threads (overlapping downloads and parsing
+        # with embedding), while ChromaDB writes stay on this thread with SQLite
+        # durability relaxed for the duration of the bulk load
+        max_workers = min(len(files), os.cpu_count() or 1) or 1
+        with self._bulk_mode(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._prepare_document_chunks, file_obj): file_obj
+                for file_obj in files
+            }
+            for future in as_completed(futures):
+                file_obj = futures[future]
+                file_id = str(file_obj.id)
+                try:
+                    prepared = future.result()
+                except Exception as e:
+                    print(f"Error indexing document {file_id}: {e}")
+                    prepared = None
+                if not prepared:
+                    failed.append(file_id)
+                    continue
+                
+                file_project_id = str(file_obj.project_id)
+                buffer = buffers.setdefault(file_project_id, {"ids": [], "documents": [], "metadatas": []})
+                for key, values in prepared.items():
+                    buffer[key].extend(values)
+                pending_files.setdefault(file_project_id, []).append(file_id)
+                
+                if len(buffer["ids"]) >= batch_size:
+                    flush(file_project_id)
+            
+            for file_project_id in list(buffers):
+                flush(file_project_id)
+        
+        print(f"Bulk indexed {len(indexed)} documents ({len(failed)} failed)")
+        return {"indexed": indexed, "failed": failed}
+    
     def get_project_documents(self, db: Session, project_id: UUID, user_id: UUID) -> List[Dict[str, Any]]:
         """Get list of indexed documents for a project."""
         try:
@@ -201,51 +459,34 @@ class RAGService:
                 File.project_id == project_id
             ).all()
             
-            # Check which files are indexed in ChromaDB
-            indexed_files = []
-            try:
-                collection = self._get_or_create_collection(str(project_id))
-                
-                for file_obj in files:
-                    # Check if file has any chunks in the collection
-                    try:
-                        results = collection.get(
-                            where={"file_id": str(file_obj.id)},
-                            limit=1
-                        )
-                        
-                        if results['ids']:  # File has indexed chunks
-                            indexed_files.append({
-                                "id": str(file_obj.id),
-                                "file_name": file_obj.file_name,
-                                "created_at": file_obj.created_at.isoformat(),
-                                "is_indexed": True
-                            })
-                        else:
-                            indexed_files.append({
-                                "id": str(file_obj.id),
-                                "file_name": file_obj.file_name,
-                                "created_at": file_obj.created_at.isoformat(),
-                                "is_indexed": False
-                            })
-                    except Exception:
-                        # File not indexed
-                        indexed_files.append({
-                            "id": str(file_obj.id),
-                            "file_name": file_obj.file_name,
-                            "created_at": file_obj.created_at.isoformat(),
-                            "is_indexed": False
-                        })
-                        
-            except Exception:
-                # Collection doesn't exist, no files are indexed
-                for file_obj in files:
-                    indexed_files.append({
-                        "id": str(file_obj.id),
-                        "file_name": file_obj.file_name,
-                        "created_at": file_obj.created_at.isoformat(),
-                        "is_indexed": False
-                    })
+            # Check which files are indexed in ChromaDB with a single lookup
+            indexed_ids = set()
+            if files:
+                try:
+                    collection = self._get_or_create_collection(str(project_id))
+                    # Every indexed file has a first chunk, so fetching only those
+                    # returns one small metadata record per indexed file
+                    results = collection.get(
+                        where={"$and": [
+                            {"file_id": {"$in": [str(file_obj.id) for file_obj in files]}},
+                            {"chunk_index": 0}
+                        ]},
+                        include=["metadatas"]
+                    )
+                    indexed_ids = {metadata["file_id"] for metadata in results["metadatas"]}
+                except Exception:
+                    # Collection unavailable, no files are indexed
+                    pass
+            
+            indexed_files = [
+                {
+                    "id": str(file_obj.id),
+                    "file_name": file_obj.file_name,
+                    "created_at": file_obj.created_at.isoformat(),
+                    "is_indexed": str(file_obj.id) in indexed_ids
+                }
+                for file_obj in files
+            ]
             
             return indexed_files
             
@@ -265,13 +506,14 @@ class RAGService:
             collection = self._get_or_create_collection(str(project_id))
             
             # Generate query embedding
-            query_embedding = self._generate_embeddings([query])[0]
+            query_embedding = self._embed_query(query)
             
             # Search for relevant chunks from the specific file
             results = collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=query_embedding.tolist(),
                 where={"file_id": str(file_id)},
-                n_results=top_k
+                n_results=top_k,
+                include=["documents"]
             )
             
             if results['documents'] and len(results['documents']) > 0:
@@ -283,7 +525,7 @@ class RAGService:
             print(f"Error retrieving chunks: {e}")
             return []
     
-    def _generate_rag_response(self, query: str, context_chunks: List[str], file_name: str) -> str:
+    async def _generate_rag_response(self, query: str, context_chunks: List[str], file_name: str) -> str:
         """Generate response using retrieved context and LLM."""
         if not context_chunks:
             return "I couldn't find relevant information in the document to answer your question."
@@ -314,7 +556,7 @@ ANSWER:"""
             # Try Gemini first
             if settings.gemini_api_key:
                 model = genai.GenerativeModel('gemini-1.5-flash')
-                response = model.generate_content(
+                response = await model.generate_content_async(
                     prompt,
                     generation_config=genai.types.GenerationConfig(
                         temperature=0.3,
@@ -343,11 +585,10 @@ ANSWER:"""
                     "max_tokens": 1000
                 }
                 
-                response = requests.post(
+                response = await self._http.post(
                     "https://openrouter.ai/api/v1/chat/completions",
                     headers=headers,
-                    json=payload,
-                    timeout=30
+                    json=payload
                 )
                 
                 if response.status_code == 200:
@@ -359,7 +600,36 @@ ANSWER:"""
         # Fallback response
         return f"I found the following relevant information in {file_name}:\n\n" + "\n\n".join(context_chunks[:2])
     
-    def chat_with_document(
+    def _lookup_chat_file(
+        self,
+        db: Session,
+        project_id: UUID,
+        file_id: UUID,
+        user_id: UUID
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return (file name, None) for an accessible file, or (None, error message)."""
+        # Verify access to project and file with a single joined query
+        file_name = db.query(File.file_name).join(
+            Project, Project.id == File.project_id
+        ).filter(
+            File.id == file_id,
+            File.project_id == project_id,
+            Project.owner_id == user_id
+        ).scalar()
+        
+        if file_name is not None:
+            return file_name, None
+        
+        # Only on a miss, tell an inaccessible project apart from a missing file
+        project_exists = db.query(
+            db.query(Project.id).filter(
+                Project.id == project_id,
+                Project.owner_id == user_id
+            ).exists()
+        ).scalar()
+        return None, "File not found in this project" if project_exists else "Project not found or access denied"
+    
+    async def chat_with_document(
         self, 
         db: Session, 
         project_id: UUID, 
@@ -369,31 +639,19 @@ ANSWER:"""
     ) -> Dict[str, Any]:
         """Chat with a specific document using RAG."""
         try:
-            # Verify access to project and file
-            project = db.query(Project).filter(
-                Project.id == project_id,
-                Project.owner_id == user_id
-            ).first()
-            
-            if not project:
-                return {
-                    "success": False,
-                    "error": "Project not found or access denied"
-                }
-            
-            file_obj = db.query(File).filter(
-                File.id == file_id,
-                File.project_id == project_id
-            ).first()
-            
-            if not file_obj:
+            # Database lookups are blocking too, so they stay off the event loop
+            file_name, error = await asyncio.to_thread(
+                self._lookup_chat_file, db, project_id, file_id, user_id
+            )
+            if error:
                 return {
                     "success": False,
-                    "error": "File not found in this project"
+                    "error": error
                 }
             
-            # Retrieve relevant chunks
-            relevant_chunks = self._retrieve_relevant_chunks(
+            # Retrieve relevant chunks (embedding and vector search are blocking)
+            relevant_chunks = await asyncio.to_thread(
+                self._retrieve_relevant_chunks,
                 query=query,
                 project_id=project_id,
                 file_id=file_id,
@@ -402,10 +660,11 @@ ANSWER:"""
             
             if not relevant_chunks:
                 # Try to index the document if it's not indexed
-                index_success = self.index_document(db, file_id, user_id)
+                index_success = await asyncio.to_thread(self.index_document, db, file_id, user_id)
                 if index_success:
                     # Retry retrieval after indexing
-                    relevant_chunks = self._retrieve_relevant_chunks(
+                    relevant_chunks = await asyncio.to_thread(
+                        self._retrieve_relevant_chunks,
                         query=query,
                         project_id=project_id,
                         file_id=file_id,
@@ -413,16 +672,16 @@ ANSWER:"""
                     )
             
             # Generate response
-            response = self._generate_rag_response(
+            response = await self._generate_rag_response(
                 query=query,
                 context_chunks=relevant_chunks,
-                file_name=file_obj.file_name
+                file_name=file_name
             )
             
             return {
                 "success": True,
                 "response": response,
-                "file_name": file_obj.file_name,
+                "file_name": file_name,
                 "chunks_used": len(relevant_chunks)
             }
             
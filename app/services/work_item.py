@@ -1,7 +1,10 @@
-import json
 import logging
+import uuid
+from collections import defaultdict
 from typing import List, Optional, Dict, Any
 from uuid import UUID
+import orjson
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
@@ -15,9 +18,19 @@ logging.basicConfig(level=logging.INFO)
 
 
 class WorkItemService:
+    # Columns written by the bulk insert of AI-generated items; the rest use column defaults
+    _AI_INSERT_COLUMNS = (
+        "id", "project_id", "parent_id", "source_file_id", "item_type", "title", "description",
+        "status", "priority", "acceptance_criteria", "estimated_hours", "order_index",
+    )
+    
     @staticmethod
-    def create_work_item_from_ai(db: Session, work_item_data: Dict[str, Any], project_id: UUID, source_file_id: UUID = None) -> WorkItem:
-        """Create a work item from parsed AI data."""
+    def create_work_item_from_ai(work_item_data: Dict[str, Any], project_id: UUID, source_file_id: UUID = None) -> WorkItem:
+        """Build a work item from parsed AI data, with its ID assigned up front.
+        
+        The instance is not added to the session, so callers can insert a whole
+        batch with a single flush.
+        """
         
         # Normalize work item type (fix any plural forms)
         raw_type = work_item_data.get("type", "task")
@@ -37,14 +50,15 @@ class WorkItemService:
         # Handle acceptance criteria (convert list to JSON string)
         acceptance_criteria = work_item_data.get("acceptance_criteria", [])
         if isinstance(acceptance_criteria, list):
-            acceptance_criteria_json = json.dumps(acceptance_criteria) if acceptance_criteria else None
+            acceptance_criteria_json = orjson.dumps(acceptance_criteria).decode() if acceptance_criteria else None
         else:
             acceptance_criteria_json = str(acceptance_criteria) if acceptance_criteria else None
         
         # Get order_index from organized data (intelligent hierarchy manager sets this)
         order_index = work_item_data.get("order_index", 1)  # Default to 1 instead of 0
         
-        db_work_item = WorkItem(
+        return WorkItem(
+            id=uuid.uuid4(),
             project_id=project_id,
             item_type=item_type,
             title=work_item_data["title"],
@@ -56,10 +70,6 @@ class WorkItemService:
             order_index=order_index,
             source_file_id=source_file_id
         )
-        
-        db.add(db_work_item)
-        db.flush()  # Get ID without committing
-        return db_work_item
     
     @staticmethod
     def create_work_items_with_hierarchy(
@@ -67,9 +77,14 @@ class WorkItemService:
         parsed_results: List[Dict[str, Any]], 
         project_id: UUID,
         file_name: str = None,
-        source_file_id: UUID = None
+        source_file_id: UUID = None,
+        commit: bool = True
     ) -> List[WorkItem]:
-        """Create work items with intelligent automatic hierarchy."""
+        """Create work items with intelligent automatic hierarchy.
+        
+        With commit=False the rows are inserted but left uncommitted, so the caller can
+        commit them together with its own changes (e.g. marking the AI job done).
+        """
         logger.info(f"🤖 Creating work items with intelligent hierarchy for project {project_id}" + (f" from file: {file_name}" if file_name else ""))
         
         # Collect all work items from all parsed results
@@ -115,7 +130,7 @@ class WorkItemService:
         creation_stats = {'epics': 0, 'stories': 0, 'tasks': 0, 'subtasks': 0, 'failed': 0}
         for item_data in organized_items:
             try:
-                work_item = WorkItemService.create_work_item_from_ai(db, item_data, project_id, source_file_id)
+                work_item = WorkItemService.create_work_item_from_ai(item_data, project_id, source_file_id)
                 created_items.append(work_item)
                 title_to_item_map[work_item.title] = work_item
                 
@@ -155,7 +170,11 @@ class WorkItemService:
                 
                 # Find parent by title
                 parent_item = title_to_item_map.get(parent_reference)
-                if parent_item:
+                if parent_item is child_item:
+                    relationships_failed += 1
+                    logger.warning(f"⚠️ Skipping self-reference for '{item_title}'")
+                elif parent_item:
+                    # IDs are assigned up front, so the foreign key can be set directly
                     child_item.parent_id = parent_item.id
                     relationships_created += 1
                     logger.debug(f"🔗 Linked '{child_item.title[:40]}...' to parent '{parent_item.title[:40]}...'")
@@ -167,18 +186,32 @@ class WorkItemService:
         if relationships_failed > 0:
             logger.warning(f"⚠️ {relationships_failed} relationships failed to create")
         
-        # Commit all changes
+        # Insert all items with one batched executemany (parents ahead of children so the
+        # self-referential foreign key holds across batches) and a single commit
         try:
-            db.commit()
-            logger.info("💾 Database commit successful")
+            if created_items:
+                rows = [
+                    {column: getattr(item, column) for column in WorkItemService._AI_INSERT_COLUMNS}
+                    for item in WorkItemService._order_parents_first(created_items)
+                ]
+                db.execute(insert(WorkItem), rows)
+            if commit:
+                db.commit()
+                logger.info("💾 Database commit successful")
         except Exception as e:
             logger.error(f"❌ Database commit failed: {str(e)}")
             db.rollback()
             raise
         
-        # Refresh all items to get updated data
-        for item in created_items:
-            db.refresh(item)
+        # Load the committed rows with one query, keeping the creation order
+        if created_items:
+            persisted = {
+                item.id: item
+                for item in db.query(WorkItem).filter(
+                    WorkItem.id.in_([item.id for item in created_items])
+                ).all()
+            }
+            created_items = [persisted[item.id] for item in created_items if item.id in persisted]
         
         # Log final summary
         logger.info(f"🎯 Successfully created {len(created_items)} work items with intelligent hierarchy for {file_name or 'project'}")
@@ -192,6 +225,41 @@ class WorkItemService:
         
         return created_items
     
+    @staticmethod
+    def _order_parents_first(items: List[WorkItem]) -> List[WorkItem]:
+        """Order new items by hierarchy depth, cutting any parent cycle among them."""
+        by_id = {item.id: item for item in items}
+        depth: Dict[UUID, int] = {}
+        
+        for item in items:
+            chain = []
+            on_chain = set()
+            node = item
+            next_depth = 0
+            while node.id not in depth:
+                chain.append(node)
+                on_chain.add(node.id)
+                parent = by_id.get(node.parent_id)
+                if parent is None:
+                    next_depth = 0
+                    break
+                if parent.id in on_chain:
+                    logger.warning(f"⚠️ Breaking parent cycle at '{node.title}'")
+                    node.parent_id = None
+                    next_depth = 0
+                    break
+                node = parent
+            else:
+                if chain:
+                    next_depth = depth[node.id] + 1
+            
+            # The walk ends at the topmost item, so assign depths back down the chain
+            for chain_item in reversed(chain):
+                depth[chain_item.id] = next_depth
+                next_depth += 1
+        
+        return sorted(items, key=lambda item: depth[item.id])
+    
     @staticmethod
     def get_project_work_items(
         db: Session, 
@@ -256,16 +324,16 @@ class WorkItemService:
         """Get work items organized in hierarchy."""
         all_items = WorkItemService.get_project_work_items(db, project_id, user_id)
         
-        # Create hierarchy mapping
-        items_by_id = {}
-        items_by_parent = {}
+        # Children lists keyed by parent ID; each item's "children" entry is the same
+        # list object, so children attach to their parent in a single pass
+        children_by_parent: Dict[UUID, List[Dict[str, Any]]] = defaultdict(list)
+        root_items = []
         
-        # First pass: create all item dictionaries
         for item in all_items:
             # Safely get source file name
             source_file_name = None
             try:
-                if hasattr(item, 'source_file') and item.source_file and hasattr(item.source_file, 'file_name'):
+                if item.source_file is not None:
                     source_file_name = item.source_file.file_name
             except Exception:
                 # If there's any issue accessing source file, default to None
@@ -279,36 +347,40 @@ class WorkItemService:
                 "priority": item.priority.value,
                 "status": item.status.value,
                 "active": item.active,
-                "acceptance_criteria": json.loads(item.acceptance_criteria) if item.acceptance_criteria else [],
+                "acceptance_criteria": WorkItemService._parse_acceptance_criteria(item.acceptance_criteria),
                 "estimated_hours": item.estimated_hours,
                 "order_index": item.order_index,
                 "parent_id": str(item.parent_id) if item.parent_id else None,
                 "created_at": item.created_at.isoformat(),
-                "children": [],
+                "children": children_by_parent[item.id],
                 "source_file_name": source_file_name
             }
             
-            items_by_id[str(item.id)] = item_dict
-            
-            # Group by parent
-            parent_key = str(item.parent_id) if item.parent_id else "root"
-            if parent_key not in items_by_parent:
-                items_by_parent[parent_key] = []
-            items_by_parent[parent_key].append(item_dict)
-        
-        # Second pass: build hierarchy
-        for parent_id, children in items_by_parent.items():
-            if parent_id != "root" and parent_id in items_by_id:
-                # Sort children by order_index
-                children.sort(key=lambda x: (x["order_index"], x["title"]))
-                items_by_id[parent_id]["children"] = children
-        
-        # Return root items (epics) sorted by order_index
-        root_items = items_by_parent.get("root", [])
-        root_items.sort(key=lambda x: (x["order_index"], x["title"]))
+            # Items whose parent is not in the result (e.g. inactive) are left out, as before
+            if item.parent_id:
+                children_by_parent[item.parent_id].append(item_dict)
+            else:
+                root_items.append(item_dict)
+        
+        # Sort children and root items (epics) by order_index
+        sort_key = lambda x: (x["order_index"], x["title"])
+        for children in children_by_parent.values():
+            children.sort(key=sort_key)
+        root_items.sort(key=sort_key)
         
         return root_items
     
+    @staticmethod
+    def _parse_acceptance_criteria(raw: Optional[str]) -> List[Any]:
+        """Decode stored acceptance criteria, tolerating plain-text values."""
+        if not raw:
+            return []
+        try:
+            return orjson.loads(raw)
+        except ValueError:
+            # Free-text criteria are stored as-is rather than as a JSON list
+            return [raw]
+    
     @staticmethod
     def update_work_item_status(
         db: Session, 
@@ -331,32 +403,34 @@ class WorkItemService:
     @staticmethod
     def get_work_item_stats(db: Session, project_id: UUID) -> Dict[str, Any]:
         """Get statistics for work items in a project."""
-        items = db.query(WorkItem).filter(WorkItem.project_id == project_id).all()
+        # Aggregate in the database: one row per (type, status, priority) combination,
+        # at most a few dozen rows however many items the project has
+        groups = db.query(
+            WorkItem.item_type,
+            WorkItem.status,
+            WorkItem.priority,
+            func.count(WorkItem.id),
+            func.coalesce(func.sum(WorkItem.estimated_hours), 0)
+        ).filter(
+            WorkItem.project_id == project_id
+        ).group_by(
+            WorkItem.item_type, WorkItem.status, WorkItem.priority
+        ).all()
         
         stats = {
-            "total_items": len(items),
+            "total_items": 0,
             "by_type": {},
             "by_status": {},
             "by_priority": {},
             "total_estimated_hours": 0
         }
         
-        for item in items:
-            # Count by type
-            item_type = item.item_type.value
-            stats["by_type"][item_type] = stats["by_type"].get(item_type, 0) + 1
-            
-            # Count by status
-            status = item.status.value
-            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-            
-            # Count by priority
-            priority = item.priority.value
-            stats["by_priority"][priority] = stats["by_priority"].get(priority, 0) + 1
-            
-            # Sum estimated hours
-            if item.estimated_hours:
-                stats["total_estimated_hours"] += item.estimated_hours
+        for item_type, item_status, priority, count, estimated_hours in groups:
+            stats["total_items"] += count
+            stats["by_type"][item_type.value] = stats["by_type"].get(item_type.value, 0) + count
+            stats["by_status"][item_status.value] = stats["by_status"].get(item_status.value, 0) + count
+            stats["by_priority"][priority.value] = stats["by_priority"].get(priority.value, 0) + count
+            stats["total_estimated_hours"] += estimated_hours
         
         return stats
     
@@ -445,20 +519,32 @@ class WorkItemService:
         user_id: UUID
     ) -> bool:
         """Delete a work item and handle cascade relationships."""
-        work_item = db.query(WorkItem).filter(WorkItem.id == work_item_id).first()
+        from app.db.models.project import Project
         
-        if not work_item:
-            return False
+        # Only items in projects the user owns can be deleted
+        owned_projects = select(Project.id).where(Project.owner_id == user_id)
+        owned_item = select(WorkItem.id).where(
+            WorkItem.id == work_item_id,
+            WorkItem.project_id.in_(owned_projects)
+        )
         
-        # Check if this item has children
-        children = db.query(WorkItem).filter(WorkItem.parent_id == work_item_id).all()
+        # Detach children (they become top-level items) with one UPDATE
+        db.query(WorkItem).filter(
+            WorkItem.parent_id.in_(owned_item)
+        ).update({WorkItem.parent_id: None}, synchronize_session=False)
+        
+        # Delete the item itself with one DELETE ... RETURNING
+        deleted = db.execute(
+            delete(WorkItem).where(
+                WorkItem.id == work_item_id,
+                WorkItem.project_id.in_(owned_projects)
+            ).returning(WorkItem.id)
+        ).first()
         
-        if children:
-            # Update children to have no parent (or you could delete them too)
-            for child in children:
-                child.parent_id = None
+        if not deleted:
+            db.rollback()
+            return False
         
-        db.delete(work_item)
         db.commit()
         return True
     
@@ -534,7 +620,7 @@ class WorkItemService:
                 'description': item.description,
                 'type': item.item_type.value,
                 'priority': item.priority.value,
-                'acceptance_criteria': json.loads(item.acceptance_criteria) if item.acceptance_criteria else [],
+                'acceptance_criteria': orjson.loads(item.acceptance_criteria) if item.acceptance_criteria else [],
                 'estimated_hours': item.estimated_hours,
                 'parent_reference': None,  # Will be set by hierarchy manager
                 'order_index': item.order_index,
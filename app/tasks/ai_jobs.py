@@ -1,7 +1,12 @@
 import logging
+import os
+from collections import Counter
 from typing import Dict, Any, List
 from uuid import UUID
-from sqlalchemy.orm import Session
+import requests
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session, undefer
 
 from app.core.celery_app import celery_app
 from app.db.session import SessionLocal
@@ -11,83 +16,169 @@ from app.db.base import *
 from app.db.models.ai_job import AIJob, JobStatus
 from app.db.models.file import File
 
-from app.services.ai import AIParser
+from app.services.ai import ai_parser
 from app.services.work_item import WorkItemService
 from app.utils.pdf_utils import PDFExtractor
 from app.utils.docx_utils import DOCXExtractor
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging (handlers and level are configured by the Celery worker)
 logger = logging.getLogger(__name__)
 
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
-@celery_app.task(bind=True, max_retries=3)
+# MIME type per supported upload extension (.doc is handed to the DOCX extractor as before)
+_EXT_TO_MIME = {
+    ".pdf": "application/pdf",
+    ".docx": DOCX_MIME,
+    ".doc": DOCX_MIME,
+    ".txt": "text/plain",
+}
+
+
+class TransientJobError(Exception):
+    """A job failure worth retrying, such as an LLM provider outage."""
+
+
+# Failures that Celery retries with jittered exponential backoff
+RETRYABLE_ERRORS = (
+    TransientJobError,
+    requests.exceptions.RequestException,
+    OperationalError,
+    TimeoutError,
+)
+
+# Shared retry policy for the AI job tasks
+AI_JOB_RETRY_OPTIONS = dict(
+    autoretry_for=RETRYABLE_ERRORS,
+    retry_backoff=60,
+    retry_backoff_max=1800,
+    retry_jitter=True,
+    max_retries=3,
+)
+
+
+def _update_job(db: Session, job_uuid: UUID, **fields: Any) -> None:
+    """Write job fields with one UPDATE and commit, bypassing the ORM unit of work."""
+    db.execute(update(AIJob).where(AIJob.id == job_uuid).values(**fields))
+    db.commit()
+
+
+def _set_progress(job_uuid: UUID, progress: int) -> None:
+    """Publish job progress from a short-lived session, keeping the task's own session free of interim commits."""
+    try:
+        with SessionLocal() as progress_db:
+            _update_job(progress_db, job_uuid, progress=progress)
+    except Exception as e:
+        # Progress is informational; never fail the job over it
+        logger.warning("Could not update progress for job %s: %s", job_uuid, e)
+
+
+def _is_transient_ai_error(error: Exception) -> bool:
+    """Whether an AI parsing failure is worth retrying (network, timeout, provider quota) rather than deterministic."""
+    if isinstance(error, RETRYABLE_ERRORS + (ConnectionError,)):
+        return True
+    return ai_parser._is_quota_exceeded(str(error))
+
+
+def _record_retryable_failure(task, db: Session, job_uuid: UUID, error: Exception) -> None:
+    """Requeue the job while Celery retries remain, or mark it failed once they run out."""
+    will_retry = task.request.retries < task.max_retries
+    logger.warning("Retryable error for job %s (attempt %s): %s", job_uuid, task.request.retries + 1, error)
+    try:
+        if db:
+            if isinstance(error, SQLAlchemyError):
+                # Clear the failed transaction; this discards every uncommitted change in the session
+                db.rollback()
+            if will_retry:
+                # No error_message while the autoretry is pending: QUEUED with an error_message means
+                # "failed to schedule" to get_failed_scheduling_jobs, and a manual retry would run the job twice
+                _update_job(db, job_uuid, status=JobStatus.QUEUED, error_message=None)
+            else:
+                _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Failed after retries: {error}")
+    except Exception as db_error:
+        logger.error("Failed to update job status: %s", db_error)
+
+
+def _load_job_with_file(db: Session, job_uuid: UUID):
+    """Load a job's (status, file_id, project_id, File) in one query; File is None if the file is gone."""
+    return db.query(AIJob.status, AIJob.file_id, AIJob.project_id, File).outerjoin(
+        File, File.id == AIJob.file_id
+    ).options(undefer(File.extracted_text)).filter(AIJob.id == job_uuid).first()
+
+
+def _queue_rag_indexing(file_id: UUID, file_record: File) -> None:
+    """Queue RAG indexing for a processed file without failing the job if it can't be queued."""
+    try:
+        index_document_for_rag.delay(str(file_id), str(file_record.uploaded_by))
+    except Exception as e:
+        # Don't fail the entire job if RAG indexing can't be queued, just log the warning
+        logger.warning("Document processing completed but RAG indexing could not be queued: %s", e)
+
+
+def _type_breakdown(work_items: List[Any]) -> Dict[str, int]:
+    """Count created work items per type in a single pass."""
+    counts = Counter(item.item_type.value for item in work_items)
+    return {
+        'epics': counts['epic'],
+        'stories': counts['story'],
+        'tasks': counts['task'],
+        'subtasks': counts['subtask']
+    }
+
+
+@celery_app.task(bind=True, **AI_JOB_RETRY_OPTIONS)
 def process_ai_job(self, job_id: str):
     """Process an AI job in the background."""
     db = None
     job_uuid = UUID(job_id)
     
     try:
-        # Create database session with error handling
-        db = SessionLocal()
-        
-        # Get the AI job
-        ai_job = db.query(AIJob).filter(AIJob.id == job_uuid).first()
-        if not ai_job:
-            logger.error(f"AI job {job_id} not found")
+        # Create database session with error handling; job writes go through _update_job,
+        # so loaded rows can stay valid across its commits instead of being refetched
+        db = SessionLocal(expire_on_commit=False)
+        
+        # Get the AI job and its file (with any cached text) in one query
+        job_row = _load_job_with_file(db, job_uuid)
+        if not job_row:
+            logger.error("AI job %s not found", job_id)
             return {"status": "failed", "error": "Job not found"}
+        job_status, file_id, project_id, file_record = job_row
+        if job_status == JobStatus.DONE:
+            # Redelivered or retried after its work items were already committed
+            logger.info("AI job %s is already done; skipping", job_id)
+            return {"status": "done", "job_id": job_id, "skipped": True}
         
         # Update job status to processing
-        ai_job.status = JobStatus.PROCESSING
-        ai_job.progress = 10
-        db.commit()
+        _update_job(db, job_uuid, status=JobStatus.PROCESSING, progress=10)
         
-        # Get the associated file
-        file_record = db.query(File).filter(File.id == ai_job.file_id).first()
         if not file_record:
-            logger.error(f"File {ai_job.file_id} not found for job {job_id}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = "Associated file not found"
-            db.commit()
+            logger.error("File %s not found for job %s", file_id, job_id)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message="Associated file not found")
             return {"status": "failed", "error": "File not found"}
         
         # Extract text from file
-        logger.info(f"Extracting text from file: {file_record.file_name}")
-        ai_job.progress = 30
-        db.commit()
+        logger.info("Extracting text from file: %s", file_record.file_name)
+        _set_progress(job_uuid, 30)
         
         try:
-            # Determine file type from extension
-            file_extension = file_record.file_name.lower().split('.')[-1] if '.' in file_record.file_name else ''
-            file_type = None
-            
-            if file_extension == 'pdf':
-                file_type = "application/pdf"
-            elif file_extension in ['docx', 'doc']:
-                file_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            elif file_extension == 'txt':
-                file_type = "text/plain"
-            else:
-                raise ValueError(f"Unsupported file extension: {file_extension}")
-            
-            text_content = extract_text_from_file(file_record.storage_path, file_type)
+            text_content = load_document_text(file_record)
             if not text_content or len(text_content.strip()) < 50:
                 raise ValueError("Insufficient text content extracted from file")
                 
         except Exception as e:
-            logger.error(f"Text extraction failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"Text extraction failed: {str(e)}"
-            db.commit()
+            if isinstance(e, RETRYABLE_ERRORS):
+                raise
+            logger.error("Text extraction failed for job %s: %s", job_id, e)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Text extraction failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
         
         # Parse content with AI using two-pass approach
-        logger.info(f"Processing text with AI for job {job_id} using two-pass approach")
-        ai_job.progress = 60
-        db.commit()
+        logger.info("Processing text with AI for job %s using two-pass approach", job_id)
+        _set_progress(job_uuid, 60)
         
         try:
-            ai_service = AIParser()
+            # Stateless, so the module-level parser is shared across jobs
+            ai_service = ai_parser
             # Use the new two-pass parsing method
             parsed_results = ai_service.parse_requirements_document_two_pass(text_content)
             
@@ -96,99 +187,63 @@ def process_ai_job(self, job_id: str):
             
             # Log the two-pass results
             total_work_items = sum(len(result.get("work_items", [])) for result in parsed_results)
-            logger.info(f"📊 Two-pass parsing completed for {file_record.file_name}:")
-            logger.info(f"   📄 Generated {len(parsed_results)} result sections")
-            logger.info(f"   📊 Total work items: {total_work_items}")
+            logger.info("Two-pass parsing completed for %s:", file_record.file_name)
+            logger.info("   Generated %s result sections", len(parsed_results))
+            logger.info("   Total work items: %s", total_work_items)
                 
         except Exception as e:
-            logger.error(f"AI parsing failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"AI parsing failed: {str(e)}"
-            db.commit()
-            
-            # Retry with exponential backoff
-            if self.request.retries < self.max_retries:
-                logger.info(f"Retrying job {job_id}, attempt {self.request.retries + 1}")
-                raise self.retry(countdown=60 * (2 ** self.request.retries))
-            
+            logger.error("AI parsing failed for job %s: %s", job_id, e)
+            if _is_transient_ai_error(e):
+                # Provider outages and quota limits clear up; let Celery retry with backoff
+                raise TransientJobError(f"AI parsing failed: {str(e)}") from e
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"AI parsing failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
         
         # Create work items
-        logger.info(f"Creating work items for job {job_id} from file: {file_record.file_name}")
-        ai_job.progress = 80
-        db.commit()
+        logger.info("Creating work items for job %s from file: %s", job_id, file_record.file_name)
+        _set_progress(job_uuid, 80)
         
         try:
+            # Left uncommitted: the work items are committed together with the DONE status below,
+            # so a retry after a failed commit can never insert them twice
             work_items = WorkItemService.create_work_items_with_hierarchy(
-                db, parsed_results, ai_job.project_id, file_record.file_name, file_record.id
+                db, parsed_results, project_id, file_record.file_name, file_record.id, commit=False
             )
             
             if not work_items:
                 raise ValueError("No work items were created")
             
             # Log detailed breakdown of created work items
-            type_breakdown = {
-                'epics': len([item for item in work_items if item.item_type.value == 'epic']),
-                'stories': len([item for item in work_items if item.item_type.value == 'story']),
-                'tasks': len([item for item in work_items if item.item_type.value == 'task']),
-                'subtasks': len([item for item in work_items if item.item_type.value == 'subtasks'])
-            }
+            type_breakdown = _type_breakdown(work_items)
             
-            logger.info(f"📊 Work items created for file '{file_record.file_name}':")
-            logger.info(f"   📖 Epics: {type_breakdown['epics']}")
-            logger.info(f"   📝 Stories: {type_breakdown['stories']}")
-            logger.info(f"   ⚡ Tasks: {type_breakdown['tasks']}")
-            logger.info(f"   🔧 Subtasks: {type_breakdown['subtasks']}")
-            logger.info(f"   📊 Total: {len(work_items)} work items")
+            logger.info("Work items created for file '%s':", file_record.file_name)
+            logger.info("   Epics: %s", type_breakdown['epics'])
+            logger.info("   Stories: %s", type_breakdown['stories'])
+            logger.info("   Tasks: %s", type_breakdown['tasks'])
+            logger.info("   Subtasks: %s", type_breakdown['subtasks'])
+            logger.info("   Total: %s work items", len(work_items))
                 
         except Exception as e:
-            logger.error(f"Work item creation failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"Work item creation failed: {str(e)}"
-            db.commit()
+            # Clear the failed insert/commit before the session is used again
+            db.rollback()
+            if isinstance(e, RETRYABLE_ERRORS):
+                raise
+            logger.error("Work item creation failed for job %s: %s", job_id, e)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Work item creation failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
         
-        # Index document for RAG (chatbot functionality)
-        logger.info(f"Indexing document for RAG: {file_record.file_name}")
-        ai_job.progress = 90
-        db.commit()
-        
-        try:
-            from app.services.rag_service import rag_service
-            index_success = rag_service.index_document(
-                db=db,
-                file_id=ai_job.file_id,
-                user_id=file_record.uploaded_by
-            )
-            
-            if index_success:
-                logger.info(f"✅ Successfully indexed document for RAG: {file_record.file_name}")
-            else:
-                logger.warning(f"⚠️ Failed to index document for RAG: {file_record.file_name}")
-                
-        except Exception as e:
-            logger.error(f"RAG indexing failed for job {job_id}: {str(e)}")
-            # Don't fail the entire job if RAG indexing fails, just log the warning
-            logger.warning(f"⚠️ Document processing completed but RAG indexing failed: {str(e)}")
-        
-        # Update job with completion
-        ai_job.status = JobStatus.DONE
-        ai_job.progress = 100
-        
-        # Create detailed completion message with breakdown
-        type_breakdown = {
-            'epics': len([item for item in work_items if item.item_type.value == 'epic']),
-            'stories': len([item for item in work_items if item.item_type.value == 'story']),
-            'tasks': len([item for item in work_items if item.item_type.value == 'task']),
-            'subtasks': len([item for item in work_items if item.item_type.value == 'subtask'])
-        }
-        
+        # Update job with completion and a detailed message with the breakdown
+        # (this commit also persists the work items)
         completion_message = f"COMPLETED: Created {len(work_items)} work items from {len(parsed_results)} sections of file '{file_record.file_name}'. Breakdown: {type_breakdown['epics']} epics, {type_breakdown['stories']} stories, {type_breakdown['tasks']} tasks, {type_breakdown['subtasks']} subtasks"
-        ai_job.error_message = completion_message
-        db.commit()
+        _update_job(db, job_uuid, status=JobStatus.DONE, progress=100, error_message=completion_message)
+        
+        # Index document for RAG (chatbot functionality) on its own queue so the
+        # AI job slot is released as soon as work items are created
+        logger.info("Queueing RAG indexing for: %s", file_record.file_name)
+        _queue_rag_indexing(file_id, file_record)
         
-        logger.info(f"✅ Successfully completed AI job {job_id} for file '{file_record.file_name}'")
-        logger.info(f"📊 Final results: {completion_message}")
+        logger.info("Successfully completed AI job %s for file '%s'", job_id, file_record.file_name)
+        logger.info("Final results: %s", completion_message)
         
         return {
             "status": "done",
@@ -199,19 +254,21 @@ def process_ai_job(self, job_id: str):
             "type_breakdown": type_breakdown
         }
         
+    except RETRYABLE_ERRORS as e:
+        _record_retryable_failure(self, db, job_uuid, e)
+        raise
+        
     except Exception as e:
-        logger.error(f"Unexpected error processing job {job_id}: {str(e)}")
+        logger.error("Unexpected error processing job %s: %s", job_id, e)
         
         # Update job status with proper error handling
         try:
             if db:
-                ai_job = db.query(AIJob).filter(AIJob.id == job_uuid).first()
-                if ai_job:
-                    ai_job.status = JobStatus.FAILED
-                    ai_job.error_message = f"Unexpected error: {str(e)}"
-                    db.commit()
+                # Clear any failed transaction; the UPDATE is a no-op if the job is gone
+                db.rollback()
+                _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Unexpected error: {str(e)}")
         except Exception as db_error:
-            logger.error(f"Failed to update job status: {db_error}")
+            logger.error("Failed to update job status: %s", db_error)
         
         return {"status": "failed", "error": str(e)}
         
@@ -220,83 +277,112 @@ def process_ai_job(self, job_id: str):
             try:
                 db.close()
             except Exception as close_error:
-                logger.error(f"Error closing database session: {close_error}")
+                logger.error("Error closing database session: %s", close_error)
+
+
+def load_document_text(file_record: File) -> str:
+    """Return the file's text, extracting it once and caching it on the file row.
+    
+    The cached value is persisted by the task's next commit, so Celery retries
+    and parser fallbacks reuse it instead of re-parsing the immutable upload.
+    """
+    if file_record.extracted_text:
+        return file_record.extracted_text
+    
+    # Determine file type from extension
+    file_extension = os.path.splitext(file_record.file_name)[1].lower()
+    file_type = _EXT_TO_MIME.get(file_extension)
+    if file_type is None:
+        raise ValueError(f"Unsupported file extension: {file_extension.lstrip('.')}")
+    
+    text_content = extract_text_from_file(file_record.storage_path, file_type)
+    file_record.extracted_text = text_content
+    return text_content
+
+
+def _read_text_file(file_path: str) -> str:
+    """Read a plain-text upload."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# Extractor per MIME type
+_EXTRACTORS = {
+    "application/pdf": PDFExtractor.extract_text_from_pdf,
+    DOCX_MIME: DOCXExtractor.extract_text_from_docx,
+    "application/msword": DOCXExtractor.extract_text_from_docx,
+    "text/plain": _read_text_file,
+}
 
 
 def extract_text_from_file(file_path: str, file_type: str) -> str:
     """Extract text content from uploaded file."""
     try:
-        if file_type == "application/pdf":
-            return PDFExtractor.extract_text_from_pdf(file_path)
-        elif file_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-            return DOCXExtractor.extract_text_from_docx(file_path)
-        elif file_type == "text/plain":
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
+        extractor = _EXTRACTORS.get(file_type)
+        if extractor is None:
             raise ValueError(f"Unsupported file type: {file_type}")
+        return extractor(file_path)
             
     except Exception as e:
-        logger.error(f"Error extracting text from {file_path}: {str(e)}")
+        logger.error("Error extracting text from %s: %s", file_path, e)
         raise
 
 
-@celery_app.task(bind=True, max_retries=3)
+@celery_app.task(bind=True, **AI_JOB_RETRY_OPTIONS)
 def process_ai_job_minimal(self, job_id: str):
     """Process an AI job with minimal parsing in the background (max 10 work items)."""
     db = None
     job_uuid = UUID(job_id)
     
     try:
-        # Create database session with error handling
-        db = SessionLocal()
-        
-        # Get the AI job
-        ai_job = db.query(AIJob).filter(AIJob.id == job_uuid).first()
-        if not ai_job:
-            logger.error(f"AI job {job_id} not found")
+        # Create database session with error handling; job writes go through _update_job,
+        # so loaded rows can stay valid across its commits instead of being refetched
+        db = SessionLocal(expire_on_commit=False)
+        
+        # Get the AI job and its file (with any cached text) in one query
+        job_row = _load_job_with_file(db, job_uuid)
+        if not job_row:
+            logger.error("AI job %s not found", job_id)
             return {"status": "failed", "error": "Job not found"}
+        job_status, file_id, project_id, file_record = job_row
+        if job_status == JobStatus.DONE:
+            # Redelivered or retried after its work items were already committed
+            logger.info("AI job %s is already done; skipping", job_id)
+            return {"status": "done", "job_id": job_id, "skipped": True}
         
         # Mark as processing
-        ai_job.status = JobStatus.PROCESSING
-        ai_job.progress = 10
-        db.commit()
+        _update_job(db, job_uuid, status=JobStatus.PROCESSING, progress=10)
         
-        # Get file record
-        file_record = db.query(File).filter(File.id == ai_job.file_id).first()
         if not file_record:
-            logger.error(f"File not found for job {job_id}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = "Associated file not found"
-            db.commit()
+            logger.error("File not found for job %s", job_id)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message="Associated file not found")
             return {"status": "failed", "error": "File not found"}
         
-        logger.info(f"🔥 Processing minimal AI job {job_id} for file: {file_record.file_name}")
+        logger.info("Processing minimal AI job %s for file: %s", job_id, file_record.file_name)
         
         # Extract text from file
-        logger.info(f"Extracting text from {file_record.storage_path}")
-        ai_job.progress = 30
-        db.commit()
+        logger.info("Extracting text from %s", file_record.storage_path)
+        _set_progress(job_uuid, 30)
         
         try:
-            text_content = extract_text_from_file(file_record.storage_path)
+            text_content = load_document_text(file_record)
             if not text_content.strip():
                 raise ValueError("No text content extracted from file")
             
         except Exception as e:
-            logger.error(f"Text extraction failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"Text extraction failed: {str(e)}"
-            db.commit()
+            if isinstance(e, RETRYABLE_ERRORS):
+                raise
+            logger.error("Text extraction failed for job %s: %s", job_id, e)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Text extraction failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
         
         # Parse content with AI using minimal approach
-        logger.info(f"Processing text with minimal AI for job {job_id}")
-        ai_job.progress = 60
-        db.commit()
+        logger.info("Processing text with minimal AI for job %s", job_id)
+        _set_progress(job_uuid, 60)
         
         try:
-            ai_service = AIParser()
+            # Stateless, so the module-level parser is shared across jobs
+            ai_service = ai_parser
             # Use the new minimal parsing method
             parsed_results = ai_service.parse_requirements_document_minimal(text_content)
             
@@ -305,96 +391,80 @@ def process_ai_job_minimal(self, job_id: str):
             
             # Log the minimal results
             total_work_items = sum(len(result.get("work_items", [])) for result in parsed_results)
-            logger.info(f"🎯 Minimal parsing completed for {file_record.file_name}:")
-            logger.info(f"   📄 Generated {len(parsed_results)} result sections")
-            logger.info(f"   📊 Total work items: {total_work_items} (minimal approach)")
+            logger.info("Minimal parsing completed for %s:", file_record.file_name)
+            logger.info("   Generated %s result sections", len(parsed_results))
+            logger.info("   Total work items: %s (minimal approach)", total_work_items)
                 
         except Exception as e:
-            logger.error(f"AI minimal parsing failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"AI minimal parsing failed: {str(e)}"
-            db.commit()
+            logger.error("AI minimal parsing failed for job %s: %s", job_id, e)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"AI minimal parsing failed: {str(e)}")
             
             # Try falling back to regular two-pass if minimal fails
             try:
-                logger.info(f"Falling back to two-pass approach for job {job_id}")
+                logger.info("Falling back to two-pass approach for job %s", job_id)
                 parsed_results = ai_service.parse_requirements_document_two_pass(text_content)
                 total_work_items = sum(len(result.get("work_items", [])) for result in parsed_results)
-                logger.info(f"📊 Fallback two-pass completed: {total_work_items} work items")
+                logger.info("Fallback two-pass completed: %s work items", total_work_items)
             except Exception as fallback_e:
-                logger.error(f"Fallback also failed for job {job_id}: {str(fallback_e)}")
+                logger.error("Fallback also failed for job %s: %s", job_id, fallback_e)
                 return {"status": "failed", "error": str(e)}
         
         # Create work items in database
-        logger.info(f"Creating work items in database for job {job_id}")
-        ai_job.progress = 80
-        db.commit()
+        logger.info("Creating work items in database for job %s", job_id)
+        _set_progress(job_uuid, 80)
         
         try:
             work_item_service = WorkItemService()
             created_items = work_item_service.create_work_items_with_hierarchy(
                 db=db,
                 parsed_results=parsed_results,
-                project_id=ai_job.project_id,
+                project_id=project_id,
                 file_name=file_record.file_name,
-                source_file_id=file_record.id
+                source_file_id=file_record.id,
+                # Committed together with the DONE status below, so a retry can't insert them twice
+                commit=False
             )
             
-            logger.info(f"✅ Minimal processing completed for {file_record.file_name}")
-            logger.info(f"   📊 Created {len(created_items)} work items in database")
+            logger.info("Minimal processing completed for %s", file_record.file_name)
+            logger.info("   Created %s work items in database", len(created_items))
             
         except Exception as e:
-            logger.error(f"Work item creation failed for job {job_id}: {str(e)}")
-            ai_job.status = JobStatus.FAILED
-            ai_job.error_message = f"Work item creation failed: {str(e)}"
-            db.commit()
+            # Clear the failed insert/commit before the session is used again
+            db.rollback()
+            if isinstance(e, RETRYABLE_ERRORS):
+                raise
+            logger.error("Work item creation failed for job %s: %s", job_id, e)
+            _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Work item creation failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
         
-        # Index document for RAG (chatbot functionality)
-        logger.info(f"Indexing document for RAG: {file_record.file_name}")
-        ai_job.progress = 90
-        db.commit()
+        # Mark as completed (this commit also persists the work items)
+        _update_job(db, job_uuid, status=JobStatus.DONE, progress=100)
         
-        try:
-            from app.services.rag_service import rag_service
-            index_success = rag_service.index_document(
-                db=db,
-                file_id=ai_job.file_id,
-                user_id=file_record.uploaded_by
-            )
-            
-            if index_success:
-                logger.info(f"✅ Successfully indexed document for RAG: {file_record.file_name}")
-            else:
-                logger.warning(f"⚠️ Failed to index document for RAG: {file_record.file_name}")
-                
-        except Exception as e:
-            logger.error(f"RAG indexing failed for job {job_id}: {str(e)}")
-            # Don't fail the entire job if RAG indexing fails, just log the warning
-            logger.warning(f"⚠️ Document processing completed but RAG indexing failed: {str(e)}")
-        
-        # Mark as completed
-        ai_job.status = JobStatus.DONE
-        ai_job.progress = 100
-        db.commit()
+        # Index document for RAG (chatbot functionality) on its own queue so the
+        # AI job slot is released as soon as work items are created
+        logger.info("Queueing RAG indexing for: %s", file_record.file_name)
+        _queue_rag_indexing(file_id, file_record)
         
-        logger.info(f"🎉 Minimal AI job {job_id} completed successfully")
+        logger.info("Minimal AI job %s completed successfully", job_id)
         return {
             "status": "completed", 
             "work_items_created": len(created_items),
             "total_work_items": total_work_items
         }
         
+    except RETRYABLE_ERRORS as e:
+        _record_retryable_failure(self, db, job_uuid, e)
+        raise
+        
     except Exception as e:
-        logger.error(f"Unexpected error in minimal AI job {job_id}: {str(e)}")
+        logger.error("Unexpected error in minimal AI job %s: %s", job_id, e)
         
         # Mark job as failed
         try:
-            ai_job = db.query(AIJob).filter(AIJob.id == job_uuid).first()
-            if ai_job:
-                ai_job.status = JobStatus.FAILED
-                ai_job.error_message = f"Unexpected error: {str(e)}"
-                db.commit()
+            if db:
+                # Clear any failed transaction; the UPDATE is a no-op if the job is gone
+                db.rollback()
+                _update_job(db, job_uuid, status=JobStatus.FAILED, error_message=f"Unexpected error: {str(e)}")
         except:
             pass  # Don't fail on cleanup failure
         
@@ -405,7 +475,38 @@ def process_ai_job_minimal(self, job_id: str):
             try:
                 db.close()
             except Exception as close_error:
-                logger.error(f"Error closing database session: {close_error}")
+                logger.error("Error closing database session: %s", close_error)
+
+
+@celery_app.task
+def index_document_for_rag(file_id: str, user_id: str):
+    """Index a processed file for RAG chat in the background."""
+    db = None
+    try:
+        db = SessionLocal()
+        from app.services.rag_service import rag_service
+        index_success = rag_service.index_document(
+            db=db,
+            file_id=UUID(file_id),
+            user_id=UUID(user_id)
+        )
+        
+        if index_success:
+            logger.info("Successfully indexed document for RAG: %s", file_id)
+        else:
+            logger.warning("Failed to index document for RAG: %s", file_id)
+        return {"status": "done" if index_success else "failed", "file_id": file_id}
+        
+    except Exception as e:
+        logger.error("RAG indexing failed for file %s: %s", file_id, e)
+        return {"status": "failed", "error": str(e)}
+        
+    finally:
+        if db:
+            try:
+                db.close()
+            except Exception as close_error:
+                logger.error("Error closing database session: %s", close_error)
 
 
 @celery_app.task
@@ -423,4 +524,4 @@ def cleanup_old_jobs():
             try:
                 db.close()
             except Exception as close_error:
-                logger.error(f"Error closing database session: {close_error}")
+                logger.error("Error closing database session: %s", close_error)
@@ -1,173 +1,436 @@
 from docx import Document
+from lxml import etree
+import asyncio
+import httpx
 import requests
 import tempfile
-import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import shutil
+import zipfile
+from typing import IO, Iterable, Iterator, List, Dict, Any, Optional, Sequence, Tuple, Union
 import re
 
 
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = f"{_W}body"
+_W_P = f"{_W}p"
+_W_R = f"{_W}r"
+_W_T = f"{_W}t"
+_W_TBL = f"{_W}tbl"
+_W_TC = f"{_W}tc"
+_W_VAL = f"{_W}val"
+
+# Run children that python-docx renders as text, besides w:t
+_RUN_TEXT = {
+    f"{_W}tab": "\t",
+    f"{_W}ptab": "\t",
+    f"{_W}cr": "\n",
+    f"{_W}noBreakHyphen": "-",
+}
+
+# Built-in style names stored lowercase in styles.xml but exposed capitalized by python-docx
+_UI_STYLE_NAMES = {
+    "caption": "Caption",
+    "footer": "Footer",
+    "header": "Header",
+    **{f"heading {level}": f"Heading {level}" for level in range(1, 10)},
+}
+
+# Buffer size for streaming URL downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# URL downloads up to this size are parsed from memory; larger ones spill to a temp file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# A local file path or an open binary file (zipfile and python-docx accept either)
+DocxSource = Union[str, IO[bytes]]
+
+# (paragraphs as (text, style name), tables as rows of cell text) in document order
+DocxContent = Tuple[List[Tuple[str, Optional[str]]], List[List[List[str]]]]
+
+
 class DOCXExtractor:
     @staticmethod
-    def _download_file_from_url(url: str) -> str:
-        """Download file from URL and return temporary file path."""
+    def _fetch_docx(url: str) -> IO[bytes]:
+        """Download file from URL into a spooled buffer rewound for reading.
+        
+        Documents up to SPOOL_MAX_SIZE never touch disk; larger ones roll over to a temp file.
+        """
         try:
             # Clean URL - remove any trailing characters
             url = url.rstrip('?')
             
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-            temp_file.write(response.content)
-            temp_file.close()
+            # Stream the body through a 1 MiB buffer instead of holding it all in memory
+            with requests.get(url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                
+                spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, suffix='.docx')
+                try:
+                    shutil.copyfileobj(response.raw, spool, length=DOWNLOAD_CHUNK_SIZE)
+                    spool.seek(0)
+                except Exception:
+                    spool.close()
+                    raise
             
-            return temp_file.name
+            return spool
         except Exception as e:
             raise Exception(f"Error downloading file from URL: {str(e)}")
     
+    @staticmethod
+    @contextmanager
+    def _open_source(file_path: str) -> Iterator[DocxSource]:
+        """Yield a local path as-is, or a downloaded URL as a file object closed on exit."""
+        if not file_path.startswith('http'):
+            yield file_path
+            return
+        
+        spool = DOCXExtractor._fetch_docx(file_path)
+        try:
+            yield spool
+        finally:
+            spool.close()
+    
+    @staticmethod
+    def _run_text(run) -> str:
+        """Render a w:r element the way python-docx's Run.text does."""
+        parts = []
+        for child in run:
+            tag = child.tag
+            if tag == _W_T:
+                parts.append(child.text or "")
+            elif tag == f"{_W}br":
+                if child.get(f"{_W}type") in (None, "textWrapping"):
+                    parts.append("\n")
+            elif tag in _RUN_TEXT:
+                parts.append(_RUN_TEXT[tag])
+        return "".join(parts)
+    
+    @staticmethod
+    def _paragraph_text(p) -> str:
+        """Text of a w:p element, including runs nested in hyperlinks."""
+        parts = []
+        for child in p:
+            if child.tag == _W_R:
+                parts.append(DOCXExtractor._run_text(child))
+            elif child.tag == f"{_W}hyperlink":
+                parts.extend(DOCXExtractor._run_text(run) for run in child.iterfind(_W_R))
+        return "".join(parts)
+    
+    @staticmethod
+    def _table_rows(tbl) -> List[List[str]]:
+        """Cell text per row of a w:tbl, repeating merged cells like python-docx's row.cells."""
+        grid = tbl.find(f"{_W}tblGrid")
+        col_count = len(grid) if grid is not None else 0
+        row_count = len(tbl.findall(f"{_W}tr"))
+        cells: List[str] = []
+        for tc in tbl.iterfind(f"{_W}tr/{_W_TC}"):
+            tc_pr = tc.find(f"{_W}tcPr")
+            grid_span, v_merge = 1, None
+            if tc_pr is not None:
+                span = tc_pr.find(f"{_W}gridSpan")
+                if span is not None:
+                    grid_span = int(span.get(_W_VAL))
+                merge = tc_pr.find(f"{_W}vMerge")
+                if merge is not None:
+                    v_merge = merge.get(_W_VAL, "continue")
+            text = "\n".join(DOCXExtractor._paragraph_text(p) for p in tc.iterfind(_W_P))
+            for span_idx in range(grid_span):
+                if v_merge == "continue":
+                    cells.append(cells[-col_count])
+                elif span_idx > 0:
+                    cells.append(cells[-1])
+                else:
+                    cells.append(text)
+        return [cells[i * col_count:(i + 1) * col_count] for i in range(row_count)]
+    
+    @staticmethod
+    def _read_paragraph_style_names(archive: zipfile.ZipFile) -> Tuple[Dict[str, str], Optional[str]]:
+        """Map paragraph style ids to display names, plus the default paragraph style name."""
+        try:
+            root = etree.fromstring(archive.read("word/styles.xml"))
+        except KeyError:
+            return {}, None
+        
+        names: Dict[str, str] = {}
+        default_name = None
+        for style in root.iterfind(f"{_W}style"):
+            if style.get(f"{_W}type") != "paragraph":
+                continue
+            style_id = style.get(f"{_W}styleId")
+            name_el = style.find(f"{_W}name")
+            name = name_el.get(_W_VAL) if name_el is not None else style_id
+            name = _UI_STYLE_NAMES.get(name, name)
+            names[style_id] = name
+            if style.get(f"{_W}default") in ("1", "true", "on"):
+                default_name = name
+        return names, default_name
+    
+    @staticmethod
+    def _iter_body_fast(file_path: DocxSource, include_tables: bool = True) -> Iterator[Tuple[str, Any]]:
+        """Stream top-level body content from word/document.xml in document order.
+        
+        Yields ("p", (text, style name)) for paragraphs and ("tbl", rows) for tables.
+        """
+        tags = (_W_P, _W_TBL) if include_tables else (_W_P,)
+        with zipfile.ZipFile(file_path) as archive:
+            style_names, default_style = DOCXExtractor._read_paragraph_style_names(archive)
+            with archive.open("word/document.xml") as document_xml:
+                for _, elem in etree.iterparse(document_xml, events=("end",), tag=tags):
+                    parent = elem.getparent()
+                    # Paragraphs and tables nested in tables are read with their outer table
+                    if parent is None or parent.tag != _W_BODY:
+                        continue
+                    
+                    if elem.tag == _W_P:
+                        style_el = elem.find(f"{_W}pPr/{_W}pStyle")
+                        style_id = style_el.get(_W_VAL) if style_el is not None else None
+                        yield "p", (
+                            DOCXExtractor._paragraph_text(elem),
+                            style_names.get(style_id, default_style)
+                        )
+                    else:
+                        yield "tbl", DOCXExtractor._table_rows(elem)
+                    
+                    # Drop processed elements so memory stays flat on long documents
+                    # (skipped tables go too, as earlier siblings of the next paragraph)
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+    
+    @staticmethod
+    def _extract_fast(file_path: DocxSource) -> DocxContent:
+        """Collect body paragraphs and tables streamed straight from word/document.xml."""
+        paragraphs: List[Tuple[str, Optional[str]]] = []
+        tables: List[List[List[str]]] = []
+        for kind, payload in DOCXExtractor._iter_body_fast(file_path):
+            if kind == "p":
+                paragraphs.append(payload)
+            else:
+                tables.append(payload)
+        return paragraphs, tables
+    
+    @staticmethod
+    def _extract_with_python_docx(file_path: DocxSource, include_tables: bool = True) -> DocxContent:
+        """Read paragraphs and tables through the python-docx object model."""
+        doc = Document(file_path)
+        paragraphs = []
+        for paragraph in doc.paragraphs:
+            style = paragraph.style
+            paragraphs.append((paragraph.text, style.name if style else None))
+        tables = [
+            [[cell.text for cell in row.cells] for row in table.rows]
+            for table in doc.tables
+        ] if include_tables else []
+        return paragraphs, tables
+    
+    @staticmethod
+    def _read_docx(file_path: DocxSource) -> DocxContent:
+        """Read a DOCX, preferring the streaming XML reader over python-docx."""
+        try:
+            return DOCXExtractor._extract_fast(file_path)
+        except Exception:
+            # Unusual packages (missing parts, malformed XML) go through python-docx
+            return DOCXExtractor._extract_with_python_docx(file_path)
+    
     @staticmethod
     def extract_text_from_docx(file_path: str) -> str:
         """Extract text from DOCX file (supports both local paths and URLs)."""
-        temp_file_path = None
         try:
-            # Check if it's a URL
-            if file_path.startswith('http'):
-                temp_file_path = DOCXExtractor._download_file_from_url(file_path)
-                actual_file_path = temp_file_path
-            else:
-                actual_file_path = file_path
+            # URLs are read from memory (or a spooled temp file when large)
+            with DOCXExtractor._open_source(file_path) as source:
+                paragraphs, tables = DOCXExtractor._read_docx(source)
             
-            doc = Document(actual_file_path)
-            text = ""
+            # Collect lines and join once; repeated str += is quadratic on long documents
+            parts: List[str] = []
             
             # Extract paragraphs
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n"
+            for paragraph_text, _ in paragraphs:
+                if paragraph_text.strip():
+                    parts.append(paragraph_text)
             
             # Extract tables
-            for table in doc.tables:
-                for row in table.rows:
+            for rows in tables:
+                for row in rows:
                     row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
+                    for cell_text in row:
+                        cell_text = cell_text.strip()
+                        if cell_text:
+                            row_text.append(cell_text)
                     if row_text:
-                        text += " | ".join(row_text) + "\n"
+                        parts.append(" | ".join(row_text))
             
-            return text.strip()
+            return "\n".join(parts).strip()
         
         except Exception as e:
             raise Exception(f"Error extracting text from DOCX: {str(e)}")
+    
+    @staticmethod
+    def _build_structured_content(paragraphs: List[Tuple[str, Optional[str]]], tables: List[List[List[str]]]) -> Dict[str, Any]:
+        """Arrange read paragraphs and tables into the structured content dict."""
+        content = {
+            "paragraphs": [],
+            "tables": [],
+            "headings": [],
+            "lists": []
+        }
         
-        finally:
-            # Clean up temporary file if it was created
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
+        # Extract paragraphs with styles
+        for paragraph_text, style_name in paragraphs:
+            paragraph_text = paragraph_text.strip()
+            if paragraph_text:
+                para_info = {
+                    "text": paragraph_text,
+                    "style": style_name or "Normal",
+                    "is_heading": style_name.startswith('Heading') if style_name else False
+                }
+                content["paragraphs"].append(para_info)
+                
+                # Separate headings
+                if para_info["is_heading"]:
+                    content["headings"].append({
+                        "text": para_info["text"],
+                        "level": para_info["style"]
+                    })
+        
+        # Extract tables
+        for table_idx, rows in enumerate(tables):
+            table_data = [
+                [cell_text.strip() for cell_text in row]
+                for row in rows
+            ]
+            
+            content["tables"].append({
+                "index": table_idx,
+                "data": table_data
+            })
+        
+        return content
+    
+    @staticmethod
+    def _read_structured_content(source: DocxSource) -> Dict[str, Any]:
+        """Read a DOCX and build its structured content."""
+        paragraphs, tables = DOCXExtractor._read_docx(source)
+        return DOCXExtractor._build_structured_content(paragraphs, tables)
     
     @staticmethod
     def extract_structured_content(file_path: str) -> Dict[str, Any]:
         """Extract structured content from DOCX file (supports both local paths and URLs)."""
-        temp_file_path = None
         try:
-            # Check if it's a URL
-            if file_path.startswith('http'):
-                temp_file_path = DOCXExtractor._download_file_from_url(file_path)
-                actual_file_path = temp_file_path
-            else:
-                actual_file_path = file_path
-            
-            doc = Document(actual_file_path)
-            content = {
-                "paragraphs": [],
-                "tables": [],
-                "headings": [],
-                "lists": []
-            }
-            
-            # Extract paragraphs with styles
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    para_info = {
-                        "text": paragraph.text.strip(),
-                        "style": paragraph.style.name if paragraph.style else "Normal",
-                        "is_heading": paragraph.style.name.startswith('Heading') if paragraph.style else False
-                    }
-                    content["paragraphs"].append(para_info)
-                    
-                    # Separate headings
-                    if para_info["is_heading"]:
-                        content["headings"].append({
-                            "text": para_info["text"],
-                            "level": para_info["style"]
-                        })
+            # URLs are read from memory (or a spooled temp file when large)
+            with DOCXExtractor._open_source(file_path) as source:
+                return DOCXExtractor._read_structured_content(source)
+        
+        except Exception as e:
+            raise Exception(f"Error extracting structured content from DOCX: {str(e)}")
+    
+    @staticmethod
+    async def _fetch_docx_async(url: str) -> IO[bytes]:
+        """Async counterpart of _fetch_docx: download into a spooled buffer without blocking the event loop."""
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, suffix='.docx')
+        try:
+            # Clean URL - remove any trailing characters
+            url = url.rstrip('?')
             
-            # Extract tables
-            for table_idx, table in enumerate(doc.tables):
-                table_data = []
-                for row in table.rows:
-                    row_data = []
-                    for cell in row.cells:
-                        row_data.append(cell.text.strip())
-                    table_data.append(row_data)
-                
-                content["tables"].append({
-                    "index": table_idx,
-                    "data": table_data
-                })
+            async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        spool.write(chunk)
             
-            return content
+            spool.seek(0)
+            return spool
+        except Exception as e:
+            spool.close()
+            raise Exception(f"Error downloading file from URL: {str(e)}")
+    
+    @staticmethod
+    async def extract_structured_content_async(file_path: str) -> Dict[str, Any]:
+        """Async version of extract_structured_content for use from request handlers.
+        
+        URLs are downloaded on the event loop and parsing runs in a worker thread,
+        so many extractions can be in flight without blocking the loop.
+        """
+        if not file_path.startswith('http'):
+            return await asyncio.to_thread(DOCXExtractor.extract_structured_content, file_path)
+        
+        try:
+            spool = await DOCXExtractor._fetch_docx_async(file_path)
+            try:
+                return await asyncio.to_thread(DOCXExtractor._read_structured_content, spool)
+            finally:
+                spool.close()
         
         except Exception as e:
             raise Exception(f"Error extracting structured content from DOCX: {str(e)}")
-        
-        finally:
-            # Clean up temporary file if it was created
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
     
     @staticmethod
-    def extract_by_sections(file_path: str) -> List[Dict[str, Any]]:
-        """Extract content organized by sections/headings (supports both local paths and URLs)."""
-        try:
-            structured_content = DOCXExtractor.extract_structured_content(file_path)
-            sections = []
-            current_section = None
+    def _build_sections(paragraphs: Iterable[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """Group (text, style name) paragraphs into sections headed by Heading-styled paragraphs."""
+        sections = []
+        current_section = None
+        
+        for paragraph_text, style_name in paragraphs:
+            paragraph_text = paragraph_text.strip()
+            if not paragraph_text:
+                continue
             
-            for para in structured_content["paragraphs"]:
-                if para["is_heading"]:
-                    # Start new section
-                    if current_section:
-                        sections.append(current_section)
-                    
+            if style_name and style_name.startswith('Heading'):
+                # Start new section
+                if current_section:
+                    sections.append(current_section)
+                
+                current_section = {
+                    "heading": paragraph_text,
+                    "level": style_name,
+                    "content": []
+                }
+            else:
+                # Add to current section or create default section
+                if current_section is None:
                     current_section = {
-                        "heading": para["text"],
-                        "level": para["style"],
+                        "heading": "Introduction",
+                        "level": "Default",
                         "content": []
                     }
-                else:
-                    # Add to current section or create default section
-                    if current_section is None:
-                        current_section = {
-                            "heading": "Introduction",
-                            "level": "Default",
-                            "content": []
-                        }
-                    
-                    current_section["content"].append(para["text"])
-            
-            # Add last section
-            if current_section:
-                sections.append(current_section)
-            
-            return sections
+                
+                current_section["content"].append(paragraph_text)
+        
+        # Add last section
+        if current_section:
+            sections.append(current_section)
+        
+        return sections
+    
+    @staticmethod
+    def extract_by_sections(file_path: str) -> List[Dict[str, Any]]:
+        """Extract content organized by sections/headings (supports both local paths and URLs)."""
+        try:
+            # Sections only need paragraphs, so stream them straight into sections
+            # without materializing the paragraph list or reading tables
+            with DOCXExtractor._open_source(file_path) as source:
+                try:
+                    return DOCXExtractor._build_sections(
+                        payload for _, payload in DOCXExtractor._iter_body_fast(source, include_tables=False)
+                    )
+                except Exception:
+                    # Unusual packages go through python-docx, rebuilding from the start
+                    paragraphs, _ = DOCXExtractor._extract_with_python_docx(source, include_tables=False)
+                    return DOCXExtractor._build_sections(paragraphs)
         
         except Exception as e:
             raise Exception(f"Error extracting sections from DOCX: {str(e)}")
+    
+    @staticmethod
+    def extract_many(file_paths: Sequence[str], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """Extract structured content from several DOCX files (local paths or URLs) concurrently.
+        
+        Results are returned in input order. Downloads and lxml parsing release the GIL,
+        so a thread pool overlaps network latency and XML parsing across files.
+        """
+        if len(file_paths) <= 1:
+            return [DOCXExtractor.extract_structured_content(path) for path in file_paths]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            return list(executor.map(DOCXExtractor.extract_structured_content, file_paths))
@@ -6,7 +6,8 @@ from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
 import json
 import logging
-from collections import defaultdict
+from bisect import bisect_right
+from collections import Counter, defaultdict
 
 # Set up logging for hierarchy management
 logger = logging.getLogger(__name__)
@@ -89,11 +90,37 @@ def create_smart_categories():
         }
     }
 
-def categorize_work_item(item_data: Dict[str, Any], categories: Dict[str, Any]) -> Optional[str]:
-    """Categorize a work item based on its content"""
+def _freeze_categories(categories: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy category configs with lowercased keyword tuples and item type frozensets for repeated matching"""
+    return {
+        category_name: {
+            **config,
+            'keywords': tuple(keyword.lower() for keyword in config['keywords']),
+            'item_types': frozenset(config['item_types'])
+        }
+        for category_name, config in categories.items()
+    }
+
+# Built once at import instead of per organization run / per categorized item
+_SMART_CATEGORIES = _freeze_categories(create_smart_categories())
+
+_PLURAL_TYPES = {'storys': 'story', 'tasks': 'task', 'subtasks': 'subtask', 'epics': 'epic'}
+
+_PRIORITY_ORDER = {'critical': 1, 'high': 2, 'medium': 3, 'low': 4}
+
+def _priority_sort_key(item: Dict[str, Any]) -> Tuple[int, str]:
+    """Sort key ordering items by priority, then title"""
+    return (_PRIORITY_ORDER.get(item.get('priority', 'medium'), 5), item.get('title', ''))
+
+def categorize_work_item(item_data: Dict[str, Any], categories: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Categorize a work item based on its content (defaults to the smart categories)"""
+    if categories is None:
+        categories = _SMART_CATEGORIES
+    
     title = item_data.get('title', '').lower()
     description = item_data.get('description', '').lower()
     item_text = f"{title} {description}"
+    item_type = item_data.get('type', 'story')
     
     best_category = None
     best_score = 0
@@ -102,13 +129,13 @@ def categorize_work_item(item_data: Dict[str, Any], categories: Dict[str, Any])
         score = 0
         
         # Check if this category supports this item type
-        item_type = item_data.get('type', 'story')
         if item_type not in config['item_types']:
             continue
         
-        # Keyword matching with weights
+        # Keyword matching with weights; one count() scan both detects and counts occurrences
         for keyword in config['keywords']:
-            if keyword in item_text:
+            count = item_text.count(keyword)
+            if count:
                 # Higher weight for title matches
                 if keyword in title:
                     score += 3
@@ -116,9 +143,7 @@ def categorize_work_item(item_data: Dict[str, Any], categories: Dict[str, Any])
                     score += 1
                 
                 # Bonus for multiple occurrences
-                count = item_text.count(keyword)
-                if count > 1:
-                    score += count - 1
+                score += count - 1
         
         # Priority boost
         if config['priority'] in ['critical', 'high'] and score > 0:
@@ -153,32 +178,89 @@ def create_epic_for_category(category_name: str, category_config: Dict[str, Any]
         '_project_id': str(project_id)
     }
 
-def assign_task_to_story(task_data: Dict[str, Any], stories: List[Dict[str, Any]]) -> Optional[str]:
-    """Find the best story for a task based on content similarity"""
-    task_text = f"{task_data.get('title', '')} {task_data.get('description', '')}".lower()
-    task_words = set(word for word in task_text.split() if len(word) > 3)
+def _significant_words(text: str) -> set:
+    """Words longer than 3 characters, used for content similarity"""
+    return set(word for word in text.split() if len(word) > 3)
+
+class CandidateIndex:
+    """Inverted indexes over candidate parents for matching many tasks against the same stories/tasks
     
-    best_story = None
-    best_score = 0
+    A candidate scores +1 for each task word that is also one of its words, plus a +0.5 bonus for
+    each task word found anywhere in its text; only candidates sharing a word are ever scored.
+    """
     
-    for story in stories:
-        story_text = f"{story.get('title', '')} {story.get('description', '')}".lower()
-        story_words = set(word for word in story_text.split() if len(word) > 3)
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self._word_index = defaultdict(list)  # word -> indices of candidates containing it as a word
+        self._substring_cache: Dict[str, List[int]] = {}
         
-        # Calculate word overlap score
-        common_words = task_words & story_words
-        score = len(common_words)
+        texts = []
+        for idx, item in enumerate(items):
+            item_text = f"{item.get('title', '')} {item.get('description', '')}".lower()
+            for word in _significant_words(item_text):
+                self._word_index[word].append(idx)
+            texts.append(item_text)
         
-        # Bonus for exact phrase matches
-        for task_word in task_words:
-            if task_word in story_text:
-                score += 0.5
+        # All texts in one string so each task word is located with a single C-level scan
+        self._corpus = "\n".join(texts)
+        self._starts = []
+        self._ends = []
+        offset = 0
+        for item_text in texts:
+            self._starts.append(offset)
+            self._ends.append(offset + len(item_text))
+            offset += len(item_text) + 1
+    
+    def _containing(self, word: str) -> List[int]:
+        """Indices of candidates whose text contains word as a substring"""
+        matches = self._substring_cache.get(word)
+        if matches is not None:
+            return matches
         
-        if score > best_score:
-            best_score = score
-            best_story = story
+        # Words never contain whitespace, so a hit cannot span the newline between two texts
+        matches = []
+        position = self._corpus.find(word)
+        while position != -1:
+            idx = bisect_right(self._starts, position) - 1
+            matches.append(idx)
+            # One hit per candidate is enough; continue from the next candidate's text
+            position = self._corpus.find(word, self._ends[idx])
+        
+        self._substring_cache[word] = matches
+        return matches
+    
+    def best_match(self, task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Highest-scoring candidate for a task (earliest on ties), or None if nothing overlaps"""
+        task_text = f"{task_data.get('title', '')} {task_data.get('description', '')}".lower()
+        
+        scores = defaultdict(float)
+        for task_word in _significant_words(task_text):
+            # Word overlap score
+            for idx in self._word_index.get(task_word, ()):
+                scores[idx] += 1
+            # Bonus for exact phrase matches
+            for idx in self._containing(task_word):
+                scores[idx] += 0.5
+        
+        if not scores:
+            return None
+        best_idx = max(scores, key=lambda idx: (scores[idx], -idx))
+        return self.items[best_idx]
+
+def assign_task_to_story(
+    task_data: Dict[str, Any],
+    stories: List[Dict[str, Any]],
+    story_index: Optional[CandidateIndex] = None
+) -> Optional[str]:
+    """Find the best story for a task based on content similarity
     
-    return story.get('title') if best_story and best_score > 0 else None
+    Pass a CandidateIndex built over stories when matching many tasks against the same stories.
+    """
+    if story_index is None:
+        story_index = CandidateIndex(stories)
+    
+    best_story = story_index.best_match(task_data)
+    return best_story.get('title') if best_story else None
 
 def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], project_id: UUID, file_name: str = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
@@ -187,25 +269,20 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
     """
     logger.info(f"🤖 Starting intelligent organization for {len(work_items_data)} work items" + (f" from file: {file_name}" if file_name else ""))
     
-    # First, normalize any plural work item types that might have slipped through
+    categories = _SMART_CATEGORIES
+    
+    # Normalize any plural work item types that might have slipped through,
+    # separating items by type in the same pass
+    items_by_type = defaultdict(list)
     for item in work_items_data:
-        item_type = item.get('type', 'task')
-        if item_type == 'storys':
-            item['type'] = 'story'
-        elif item_type == 'tasks':
-            item['type'] = 'task'
-        elif item_type == 'subtasks':
-            item['type'] = 'subtask'
-        elif item_type == 'epics':
-            item['type'] = 'epic'
-    
-    categories = create_smart_categories()
-    
-    # Separate items by type
-    epics = [item for item in work_items_data if item.get('type') == 'epic']
-    stories = [item for item in work_items_data if item.get('type') == 'story']
-    tasks = [item for item in work_items_data if item.get('type') == 'task']
-    subtasks = [item for item in work_items_data if item.get('type') == 'subtask']
+        item_type = item.get('type')
+        if item_type in _PLURAL_TYPES:
+            item_type = item['type'] = _PLURAL_TYPES[item_type]
+        items_by_type[item_type].append(item)
+    epics = items_by_type['epic']
+    stories = items_by_type['story']
+    tasks = items_by_type['task']
+    subtasks = items_by_type['subtask']
     
     # Log initial distribution
     logger.info(f"📊 Initial work item distribution for {file_name or 'project'}:")
@@ -241,7 +318,7 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
             stats['categories_used'].append(category)
             stats['epic_category_mapping'][epic['title']] = category
             logger.info(f"   📖 Epic '{epic['title'][:50]}...' categorized as '{category}'")
-        organized_items.append(epic)
+    organized_items.extend(epics)
     
     # Step 2: Create epics for orphaned stories
     logger.info("📝 Processing stories and creating missing epics...")
@@ -289,11 +366,13 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
     
     # Step 4: Assign tasks to stories
     logger.info("⚡ Processing tasks and linking to stories...")
+    # Index candidate parents once rather than rescanning them per task/subtask
+    story_index = CandidateIndex(stories)
     tasks_assigned = 0
     for task in tasks:
         if not task.get('parent_reference'):
             # Find best matching story
-            best_story_title = assign_task_to_story(task, stories)
+            best_story_title = assign_task_to_story(task, stories, story_index)
             if best_story_title:
                 task['parent_reference'] = best_story_title
                 stats['assigned_relationships'] += 1
@@ -309,20 +388,21 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
                 else:
                     stats['orphaned_items'] += 1
                     logger.warning(f"   ⚠️ Task '{task['title'][:40]}...' remains orphaned - no stories available")
-        
-        organized_items.append(task)
+    
+    organized_items.extend(tasks)
     
     logger.info(f"   ✅ Successfully assigned {tasks_assigned} tasks to stories")
     
     # Step 5: Assign subtasks to tasks (or stories if no tasks)
     logger.info("🔧 Processing subtasks and linking to tasks/stories...")
     subtasks_assigned = 0
+    parent_index = CandidateIndex(tasks) if tasks else story_index
     for subtask in subtasks:
         if not subtask.get('parent_reference'):
             # Prefer tasks, then stories
             potential_parents = tasks if tasks else stories
             if potential_parents:
-                best_parent_title = assign_task_to_story(subtask, potential_parents)
+                best_parent_title = assign_task_to_story(subtask, potential_parents, parent_index)
                 if best_parent_title:
                     subtask['parent_reference'] = best_parent_title
                     stats['assigned_relationships'] += 1
@@ -338,18 +418,29 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
             else:
                 stats['orphaned_items'] += 1
                 logger.warning(f"   ⚠️ Subtask '{subtask['title'][:40]}...' remains orphaned - no tasks or stories available")
-        
-        organized_items.append(subtask)
+    
+    organized_items.extend(subtasks)
     
     logger.info(f"   ✅ Successfully assigned {subtasks_assigned} subtasks to parents")
     
     # Step 6: Set order indices
     logger.info("📋 Setting order indices for organized items...")
-    priority_order = {'critical': 1, 'high': 2, 'medium': 3, 'low': 4}
+    
+    # Bucket epics and parented children in one pass; items without parents (except epics) default to order 1
+    epics_in_organized = []
+    parent_children_map = defaultdict(list)
+    orphaned_ordered = 0
+    for item in organized_items:
+        if item.get('type') == 'epic':
+            epics_in_organized.append(item)
+        elif item.get('parent_reference'):
+            parent_children_map[item['parent_reference']].append(item)
+        elif 'order_index' not in item:
+            item['order_index'] = 1
+            orphaned_ordered += 1
     
     # Sort epics by priority
-    epics_in_organized = [item for item in organized_items if item.get('type') == 'epic']
-    epics_in_organized.sort(key=lambda x: (priority_order.get(x.get('priority', 'medium'), 5), x.get('title', '')))
+    epics_in_organized.sort(key=_priority_sort_key)
     
     for i, epic in enumerate(epics_in_organized):
         epic['order_index'] = i + 1
@@ -357,37 +448,24 @@ def organize_work_items_intelligently(work_items_data: List[Dict[str, Any]], pro
     logger.info(f"   📖 Ordered {len(epics_in_organized)} epics by priority")
     
     # Sort other items within their parent groups
-    parent_children_map = defaultdict(list)
-    for item in organized_items:
-        if item.get('type') != 'epic':
-            parent_ref = item.get('parent_reference')
-            if parent_ref:
-                parent_children_map[parent_ref].append(item)
-    
     relationships_ordered = 0
     for parent_title, children in parent_children_map.items():
-        children.sort(key=lambda x: (priority_order.get(x.get('priority', 'medium'), 5), x.get('title', '')))
+        children.sort(key=_priority_sort_key)
         for i, child in enumerate(children):
             child['order_index'] = i + 1
             relationships_ordered += 1
     
     logger.info(f"   🔗 Ordered {relationships_ordered} child items within their parent groups")
     
-    # Set order_index to 1 for items without parents (except epics)
-    orphaned_ordered = 0
-    for item in organized_items:
-        if item.get('type') != 'epic' and 'order_index' not in item:
-            item['order_index'] = 1
-            orphaned_ordered += 1
-    
     if orphaned_ordered > 0:
         logger.info(f"   ⚠️ Set default order for {orphaned_ordered} orphaned items")
     
+    final_type_counts = Counter(item.get('type') for item in organized_items)
     stats['final_counts'] = {
-        'epics': len([item for item in organized_items if item.get('type') == 'epic']),
-        'stories': len([item for item in organized_items if item.get('type') == 'story']),
-        'tasks': len([item for item in organized_items if item.get('type') == 'task']),
-        'subtasks': len([item for item in organized_items if item.get('type') == 'subtask'])
+        'epics': final_type_counts['epic'],
+        'stories': final_type_counts['story'],
+        'tasks': final_type_counts['task'],
+        'subtasks': final_type_counts['subtask']
     }
     
     # Log final organization summary
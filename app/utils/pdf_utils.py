@@ -2,7 +2,7 @@ import PyPDF2
 import requests
 import tempfile
 import os
-from typing import Optional, List
+from typing import Iterator, Optional, List
 from pathlib import Path
 
 
@@ -38,13 +38,11 @@ class PDFExtractor:
             else:
                 actual_file_path = file_path
             
-            text = ""
             with open(actual_file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+                # Join once at the end; repeated str += is quadratic on long documents
+                text = "\n".join(page.extract_text() for page in pdf_reader.pages)
             
             return text.strip()
         
@@ -60,8 +58,12 @@ class PDFExtractor:
                     pass
     
     @staticmethod
-    def extract_text_by_pages(file_path: str) -> List[str]:
-        """Extract text from PDF file, returning list of pages (supports both local paths and URLs)."""
+    def iter_text_by_pages(file_path: str) -> Iterator[str]:
+        """Yield the text of each non-empty PDF page in order (supports both local paths and URLs).
+        
+        Pages are extracted lazily, so callers can process a large document without
+        holding its full text in memory.
+        """
         temp_file_path = None
         try:
             # Check if it's a URL
@@ -71,17 +73,13 @@ class PDFExtractor:
             else:
                 actual_file_path = file_path
             
-            pages = []
             with open(actual_file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
+                for page in pdf_reader.pages:
                     page_text = page.extract_text().strip()
-                    if page_text:  # Only add non-empty pages
-                        pages.append(page_text)
-            
-            return pages
+                    if page_text:  # Only yield non-empty pages
+                        yield page_text
         
         except Exception as e:
             raise Exception(f"Error extracting pages from PDF: {str(e)}")
@@ -94,6 +92,11 @@ class PDFExtractor:
                 except Exception:
                     pass
     
+    @staticmethod
+    def extract_text_by_pages(file_path: str) -> List[str]:
+        """Extract text from PDF file, returning list of pages (supports both local paths and URLs)."""
+        return list(PDFExtractor.iter_text_by_pages(file_path))
+    
     @staticmethod
     def get_pdf_info(file_path: str) -> dict:
         """Get PDF metadata information (supports both local paths and URLs)."""